@@ -1,13 +1,35 @@
 import json
 import logging
+from collections.abc import Callable
+from functools import cache
 
 from apig_wsgi import make_lambda_handler
 
 from webapp import create_app
-from webapp.config import Config, configure_logger, configure_sentry
+from webapp.config import configure_logger, configure_sentry, get_config_snapshot
+from webapp.metrics import flush_metrics, start_invocation
 
 logger = logging.getLogger(__name__)
-CONFIG = Config()
+
+
+@cache
+def get_apig_wsgi_handler() -> Callable[[dict, dict], dict]:
+    """Perform one-time setup and wrap the Flask app in an 'apig-wsgi' handler.
+
+    The result is cached for the lifetime of the Lambda execution environment
+    (i.e., the container), so that warm invocations reuse the same Flask app,
+    WSGI adapter, logging and Sentry configuration instead of rebuilding them
+    on every request. If setup fails (e.g., missing environment variables),
+    nothing is cached and the next invocation will retry setup.
+
+    The configuration snapshot is created (and validated) here, so a misconfigured
+    container fails once, on its first invocation.
+    """
+    get_config_snapshot()
+    logger.info(configure_logger(verbose=True))
+    logger.info(configure_sentry())
+    # compressed responses must be base64-encoded in the response payload
+    return make_lambda_handler(create_app(), binary_support=True)
 
 
 def lambda_handler(event: dict, context: dict) -> dict:
@@ -19,17 +41,22 @@ def lambda_handler(event: dict, context: dict) -> dict:
     Flask app response into a payload suitable for the Lambda Function URL
     to return to the caller.
 
-    See https://github.com/adamchainz/apig-wsgi/tree/main.
-    """
-    CONFIG.check_required_env_vars()
-    logger.info(configure_logger(verbose=True))
-    logger.info(configure_sentry())
+    The wrapped Flask app is built once per container (see get_apig_wsgi_handler).
 
-    apig_wsgi_handler = make_lambda_handler(create_app())
+    The metrics of the invocation (see webapp.metrics) are written once, when the
+    invocation ends.
 
+    See https://github.com/adamchainz/apig-wsgi/tree/main.
+    """
+    start_invocation(cold_start=get_apig_wsgi_handler.cache_info().currsize == 0)
     try:
-        logger.debug(json.dumps(event))
-    except TypeError as error:
-        logger.warning(error)
+        apig_wsgi_handler = get_apig_wsgi_handler()
+
+        try:
+            logger.debug(json.dumps(event))
+        except TypeError as error:
+            logger.warning(error)
 
-    return apig_wsgi_handler(event, context)
+        return apig_wsgi_handler(event, context)
+    finally:
+        flush_metrics()
@@ -0,0 +1,79 @@
+"""Benchmarks for retrieving the summary of a task run's logs from CloudWatch.
+
+Compares the API calls made and the bytes transferred by each retrieval mode of
+CloudWatchLogsClient.get_log_messages for a long, verbose run.
+Run with 'pytest tests/benchmarks -s' to print the results.
+"""
+
+from datetime import timedelta
+
+import boto3
+import pytest
+from moto.core.utils import unix_time_millis, utcnow
+
+from webapp.utils.aws import CloudWatchLogsClient
+
+VERBOSE_LOG_EVENTS = 5000
+
+
+@pytest.fixture
+def mock_cloudwatchlogs_log_stream_verbose_run_task(
+    cloudwatch_sapinvoices_review_run_logs, mock_cloudwatchlogs_log_group
+):
+    logs = boto3.client("logs", region_name="us-east-1")
+    log_stream_name = "sapinvoices/mock-sapinvoices-ecs-test/abc003"
+    logs.create_log_stream(
+        logGroupName=mock_cloudwatchlogs_log_group, logStreamName=log_stream_name
+    )
+    messages = [
+        f"INFO sapinvoices.sap: Processing invoice {index} for vendor {index % 50}"
+        for index in range(VERBOSE_LOG_EVENTS)
+    ] + cloudwatch_sapinvoices_review_run_logs
+    start = utcnow() - timedelta(hours=1)
+    for batch_start in range(0, len(messages), 1000):
+        logs.put_log_events(
+            logGroupName=mock_cloudwatchlogs_log_group,
+            logStreamName=log_stream_name,
+            logEvents=[
+                {
+                    "timestamp": int(
+                        unix_time_millis(start + timedelta(milliseconds=index * 10))
+                    ),
+                    "message": message,
+                }
+                for index, message in enumerate(
+                    messages[batch_start : batch_start + 1000], start=batch_start
+                )
+            ],
+        )
+
+
+@pytest.mark.benchmark
+def test_benchmark_get_log_messages_modes(
+    mock_cloudwatchlogs_log_stream_verbose_run_task,
+):
+    cloudwatchlogs_client = CloudWatchLogsClient()
+    calls: dict[str, list[int]] = {}
+
+    def record_call(http_response, **_kwargs):
+        calls[mode].append(len(http_response.content))
+
+    cloudwatchlogs_client.client.meta.events.register(
+        "after-call.cloudwatch-logs", record_call
+    )
+    summaries = {}
+    for mode in ("full", "tail", "filter"):
+        calls[mode] = []
+        summaries[mode] = cloudwatchlogs_client.get_log_messages("abc003", mode=mode)
+
+    results = [
+        f"  {mode:>6}: {len(responses)} API calls, {sum(responses)} bytes"
+        for mode, responses in calls.items()
+    ]
+    print(  # noqa: T201
+        f"\nLog summary retrieval for {VERBOSE_LOG_EVENTS} verbose log events:\n"
+        + "\n".join(results)
+    )
+    assert summaries["full"] == summaries["tail"] == summaries["filter"]
+    assert sum(calls["tail"]) < sum(calls["full"])
+    assert sum(calls["filter"]) < sum(calls["full"])
@@ -0,0 +1,59 @@
+"""Benchmark for the time it takes to import the Lambda entry point.
+
+The modules imported by 'lambdas' are loaded on every cold start, before the first
+request is handled. The import time is measured with 'python -X importtime' in a
+fresh interpreter and must stay within IMPORT_TIME_BUDGET_MS.
+Run with 'pytest tests/benchmarks -s' to print the results.
+"""
+
+import re
+import statistics
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_TIME_BUDGET_MS = 400
+IMPORTS = 5
+
+
+def _import_time_ms(module: str) -> tuple[float, dict[str, float]]:
+    """Import a module in a fresh interpreter and get its import time (in ms).
+
+    Returns the cumulative import time of the module and of every module it imported.
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    import_times = {
+        match[2].strip(): int(match[1]) / 1000
+        for match in re.finditer(
+            r"^import time:\s+\d+ \|\s+(\d+) \|(.+)$", result.stderr, re.MULTILINE
+        )
+    }
+    return import_times[module], import_times
+
+
+@pytest.mark.benchmark
+def test_benchmark_lambdas_import_time_within_budget():
+    _import_time_ms("lambdas")  # write bytecode of changed modules
+    timings = []
+    for _ in range(IMPORTS):
+        import_time, import_times = _import_time_ms("lambdas")
+        timings.append(import_time)
+
+    slowest = sorted(
+        ((name, time) for name, time in import_times.items() if name != "lambdas"),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:5]
+    print(  # noqa: T201
+        f"\n'import lambdas' over {IMPORTS} imports: "
+        f"median={statistics.median(timings):.2f}ms "
+        f"(budget={IMPORT_TIME_BUDGET_MS}ms), slowest imports: "
+        + ", ".join(f"{module}={time:.2f}ms" for module, time in slowest)
+    )
+    assert statistics.median(timings) < IMPORT_TIME_BUDGET_MS
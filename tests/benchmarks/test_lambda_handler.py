@@ -0,0 +1,50 @@
+"""Benchmarks for per-invocation overhead of lambdas.lambda_handler.
+
+Run with 'pytest tests/benchmarks -s' to print the measured timings.
+"""
+
+import statistics
+import time
+
+import pytest
+
+import lambdas
+
+INVOCATIONS = 10
+
+
+def _time_invocations(event, *, cold: bool) -> list[float]:
+    timings = []
+    for _ in range(INVOCATIONS):
+        if cold:
+            lambdas.get_apig_wsgi_handler.cache_clear()
+        start = time.perf_counter()
+        response = lambdas.lambda_handler(event, {})
+        timings.append(time.perf_counter() - start)
+        assert response["statusCode"] == 200  # noqa: PLR2004
+    return timings
+
+
+@pytest.mark.benchmark
+def test_benchmark_lambda_handler_cold_vs_warm_overhead(
+    lambda_function_event_payload,
+    mock_parse_oidc_data,
+    ecs_client,
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    event = lambda_function_event_payload
+    event["rawPath"] = event["requestContext"]["http"]["path"] = (
+        "/process-invoices/status/abc001/data"
+    )
+
+    cold = _time_invocations(event, cold=True)
+    lambdas.get_apig_wsgi_handler.cache_clear()
+    lambdas.lambda_handler(event, {})  # prime the container
+    warm = _time_invocations(event, cold=False)
+
+    print(  # noqa: T201
+        f"\nlambda_handler per-invocation time over {INVOCATIONS} invocations: "
+        f"cold median={statistics.median(cold) * 1000:.2f}ms, "
+        f"warm median={statistics.median(warm) * 1000:.2f}ms"
+    )
+    assert statistics.median(warm) < statistics.median(cold)
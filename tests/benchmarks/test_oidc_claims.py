@@ -0,0 +1,41 @@
+"""Benchmarks for parsing OIDC user claims.
+
+Compares parse_oidc_data when the user claims JWT is verified on every call and
+when the verified claims are cached by access token (see get_oidc_claims_cache).
+Run with 'pytest tests/benchmarks -s' to print the results.
+"""
+
+import statistics
+import time
+
+import pytest
+
+from webapp.utils import parse_oidc_data
+
+CALLS = 200
+
+
+def _time_calls(encoded_jwt: str, access_token: str | None) -> list[float]:
+    timings = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        parse_oidc_data(encoded_jwt, access_token=access_token)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+@pytest.mark.benchmark
+def test_benchmark_parse_oidc_data_with_claims_cache(
+    encoded_oidc_jwt, oidc_access_token, mock_oidc_public_key
+):
+    uncached = _time_calls(encoded_oidc_jwt, access_token=None)
+    cached = _time_calls(encoded_oidc_jwt, access_token=oidc_access_token)
+
+    print(  # noqa: T201
+        f"\nparse_oidc_data over {CALLS} calls: "
+        f"verified every call median={statistics.median(uncached) * 1e6:.1f}us, "
+        f"cached by access token median={statistics.median(cached) * 1e6:.1f}us "
+        f"({statistics.median(uncached) / statistics.median(cached):.0f}x faster)"
+    )
+    assert mock_oidc_public_key.get.call_count == CALLS + 1
+    assert statistics.median(cached) < statistics.median(uncached)
@@ -0,0 +1,67 @@
+"""Benchmarks for the size of the Flask session cookie.
+
+Compares the session cookie sent with every request (e.g., every status poll)
+when the session holds the access token and every OIDC claim, as it did before,
+and when it holds the compact session stored by load_user_from_request.
+Run with 'pytest tests/benchmarks -s' to print the results.
+"""
+
+import time
+
+import jwt
+import pytest
+
+OIDC_CLAIMS = {
+    "sub": "00u1a2b3c4d5e6f7g8h9",
+    "mit_id": "123",
+    "name": "Authenticated User",
+    "given_name": "Authenticated",
+    "family_name": "User",
+    "preferred_username": "auser@mit.edu",
+    "email": "auser@mit.edu",
+    "email_verified": True,
+    "exp": int(time.time()) + 120,
+    "iss": "https://okta.mit.edu/oauth2/default",
+}
+
+
+@pytest.mark.benchmark
+def test_benchmark_session_cookie_size(
+    sapinvoices_app, sapinvoices_client, oidc_signing_key, mock_parse_oidc_data
+):
+    # access tokens issued by the IdP are JWTs with scopes and groups
+    access_token = jwt.encode(
+        {
+            **OIDC_CLAIMS,
+            "aud": "api://default",
+            "cid": "0oa1b2c3d4e5f6g7h8i9",
+            "scp": ["openid", "profile", "email"],
+            "groups": [f"group-{index}" for index in range(20)],
+        },
+        oidc_signing_key,
+        algorithm="ES256",
+        headers={"kid": "abc"},
+    )
+    mock_parse_oidc_data.return_value = OIDC_CLAIMS
+    sapinvoices_client.get(
+        "/",
+        headers={"x-amzn-oidc-accesstoken": access_token, "x-amzn-oidc-data": "abc"},
+    )
+    cookie = sapinvoices_client.get_cookie("session")
+    assert cookie is not None
+
+    serializer = sapinvoices_app.session_interface.get_signing_serializer(sapinvoices_app)
+    legacy_session = serializer.dumps(
+        {"oidc_access_token": access_token, "oidc_data": OIDC_CLAIMS}
+    )
+    # bytes of the 'Cookie: session=...' request header
+    legacy_bytes = len(f"Cookie: session={legacy_session}")
+    compact_bytes = len(f"Cookie: session={cookie.value}")
+
+    print(  # noqa: T201
+        f"\nsession cookie header: access token and all claims={legacy_bytes} bytes, "
+        f"compact={compact_bytes} bytes "
+        f"(saves {legacy_bytes - compact_bytes} bytes per request, "
+        f"{(legacy_bytes - compact_bytes) * 12} bytes per minute of 5s polling)"
+    )
+    assert compact_bytes < legacy_bytes
@@ -0,0 +1,59 @@
+"""Benchmarks for rendering templates after a cold start.
+
+Compares the first render of a page by a new app when templates are compiled at
+runtime and when their bytecode was compiled ahead of time (see
+webapp.utils.templates.compile_templates), and the render by a warm app.
+Run with 'pytest tests/benchmarks -s' to print the results.
+"""
+
+import statistics
+import time
+
+import pytest
+
+from webapp import create_app
+from webapp.config import get_config_snapshot
+from webapp.utils.templates import compile_templates
+
+RENDERS = 10
+
+
+def _time_first_renders(headers) -> list[float]:
+    timings = []
+    for _ in range(RENDERS):
+        client = create_app().test_client()
+        start = time.perf_counter()
+        client.get("/process-invoices", headers=headers)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+@pytest.mark.benchmark
+def test_benchmark_first_render_with_precompiled_templates(
+    monkeypatch, tmp_path, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    monkeypatch.setenv("TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "does-not-exist"))
+    compiled = _time_first_renders(mock_request_headers_oidc_data)
+
+    monkeypatch.setenv("TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "template_cache"))
+    get_config_snapshot.cache_clear()
+    compile_templates(create_app())
+    precompiled = _time_first_renders(mock_request_headers_oidc_data)
+
+    client = create_app().test_client()
+    client.get("/process-invoices", headers=mock_request_headers_oidc_data)
+    warm = []
+    for _ in range(RENDERS):
+        start = time.perf_counter()
+        client.get("/process-invoices", headers=mock_request_headers_oidc_data)
+        warm.append(time.perf_counter() - start)
+
+    compile_time = statistics.median(compiled) - statistics.median(precompiled)
+    print(  # noqa: T201
+        f"\nfirst render of '/process-invoices' over {RENDERS} cold starts: "
+        f"compiled at runtime median={statistics.median(compiled) * 1000:.2f}ms, "
+        f"precompiled median={statistics.median(precompiled) * 1000:.2f}ms "
+        f"(template compile time={compile_time * 1000:.2f}ms), "
+        f"warm median={statistics.median(warm) * 1000:.2f}ms"
+    )
+    assert statistics.median(precompiled) < statistics.median(compiled)
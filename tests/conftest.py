@@ -1,20 +1,38 @@
 import json
+import time
 from datetime import timedelta
 from unittest import mock
 from unittest.mock import patch
 
 import boto3
+import jwt
 import pandas as pd
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
 from moto import mock_aws
 from moto.core import DEFAULT_ACCOUNT_ID as ACCOUNT_ID
 from moto.core.utils import unix_time_millis, utcnow
 from moto.moto_api import state_manager
 
+import lambdas
 from webapp import create_app
 from webapp.app import User
-from webapp.config import Config
-from webapp.utils.aws import CloudWatchLogsClient, ECSClient
+from webapp.config import Config, get_config_snapshot
+from webapp.utils import (
+    get_completed_task_logs_cache,
+    get_oidc_claims_cache,
+    get_run_history_page_cache,
+    get_task_result_cache,
+)
+from webapp.utils.aws import (
+    CloudWatchLogsClient,
+    ECSClient,
+    clear_clients,
+    get_task_definition_cache,
+)
+from webapp.utils.history import get_run_history_store
+from webapp.utils.public_keys import get_public_key_cache
 
 AWS_DEFAULT_REGION = "us-east-1"
 
@@ -42,6 +60,50 @@ def _test_env(monkeypatch):
     monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
 
 
+# functools.cache getters of state shared by the process (e.g., by a warm container)
+CACHED_GETTERS = (
+    lambdas.get_apig_wsgi_handler,
+    get_config_snapshot,
+    get_completed_task_logs_cache,
+    get_oidc_claims_cache,
+    get_public_key_cache,
+    get_run_history_page_cache,
+    get_run_history_store,
+    get_task_definition_cache,
+    get_task_result_cache,
+)
+
+
+def _reset_process_state():
+    for cached_getter in CACHED_GETTERS:
+        cached_getter.cache_clear()
+    clear_clients()
+
+
+@pytest.fixture(autouse=True)
+def _reset_cached_getters():
+    _reset_process_state()
+    yield
+    _reset_process_state()
+
+
+@pytest.fixture
+def sqlite_run_history_store(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_STORE", "sqlite")
+    monkeypatch.setenv("RUN_HISTORY_SQLITE_PATH", ":memory:")
+    return get_run_history_store()
+
+
+@pytest.fixture
+def mock_s3_run_history_bucket(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_STORE", "s3")
+    monkeypatch.setenv("RUN_HISTORY_S3_BUCKET", "mock-sapinvoices-run-history")
+    with mock_aws():
+        s3 = boto3.client("s3", region_name=AWS_DEFAULT_REGION)
+        s3.create_bucket(Bucket="mock-sapinvoices-run-history")
+        yield "mock-sapinvoices-run-history"
+
+
 @pytest.fixture
 def config():
     return Config()
@@ -73,6 +135,42 @@ def mock_parse_oidc_data():
         yield mock_parse_oidc_data
 
 
+@pytest.fixture
+def oidc_signing_key():
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+@pytest.fixture
+def mock_oidc_public_key(oidc_signing_key):
+    public_key = oidc_signing_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    with patch("webapp.utils.public_keys.get_public_key_cache") as mock_get_cache:
+        mock_get_cache.return_value.get.return_value = public_key.decode()
+        yield mock_get_cache.return_value
+
+
+@pytest.fixture
+def oidc_access_token():
+    return "abc"
+
+
+@pytest.fixture
+def encoded_oidc_jwt(oidc_signing_key):
+    # a key ID of 3 characters keeps the JWT headers free of base64 padding
+    return jwt.encode(
+        {
+            "mit_id": "123",
+            "name": "Authenticated User",
+            "preferred_username": "auser@mit.edu",
+            "exp": int(time.time()) + 120,
+        },
+        oidc_signing_key,
+        algorithm="ES256",
+        headers={"kid": "abc"},
+    )
+
+
 @pytest.fixture
 def mock_request_headers_oidc_data():
     return {"x-amzn-oidc-accesstoken": "abc", "x-amzn-oidc-data": "abc"}
@@ -170,9 +268,9 @@ def ecs_client_get_active_tasks_success(
         boto3_ecs_client_describe_tasks_response_success
     )
     with patch(
-        "webapp.utils.aws.ECSClient.get_tasks"
-    ) as mock_webapp_ecs_client_get_tasks:
-        mock_webapp_ecs_client_get_tasks.return_value = [
+        "webapp.utils.aws.ECSClient.list_tasks"
+    ) as mock_webapp_ecs_client_list_tasks:
+        mock_webapp_ecs_client_list_tasks.return_value = [
             "arn:aws:ecs:us-east-1:123456789012:task/mock-sapinvoices-ecs-test/abc123"
         ]
         yield
@@ -274,6 +372,37 @@ def mock_cloudwatchlogs_log_stream_final_run_task(
     )
 
 
+@pytest.fixture
+def mock_cloudwatchlogs_log_streams_run_history(mock_cloudwatchlogs_log_group):
+    """Mocks CloudWatch log streams for five task runs, 'abc101' through 'abc105'.
+
+    Each task run logs a single message, one minute after the previous task run,
+    so that 'abc105' is the most recently active run. A log stream that does not
+    belong to a task run is also created.
+    """
+    logs = boto3.client("logs", region_name=AWS_DEFAULT_REGION)
+    for count in range(1, 6):
+        log_stream_name = f"sapinvoices/mock-sapinvoices-ecs-test/abc10{count}"
+        logs.create_log_stream(
+            logGroupName=mock_cloudwatchlogs_log_group, logStreamName=log_stream_name
+        )
+        logs.put_log_events(
+            logGroupName=mock_cloudwatchlogs_log_group,
+            logStreamName=log_stream_name,
+            logEvents=[
+                {
+                    "timestamp": int(
+                        unix_time_millis(utcnow() + timedelta(minutes=count))
+                    ),
+                    "message": f"Run {count}",
+                }
+            ],
+        )
+    logs.create_log_stream(
+        logGroupName=mock_cloudwatchlogs_log_group, logStreamName="other/abc999"
+    )
+
+
 @pytest.fixture
 def cloudwatch_sapinvoices_review_run_logs():
     return pd.read_csv("tests/fixtures/cloudwatch_sapinvoices_review_run_logs.csv")[
@@ -1,10 +1,15 @@
+import json
+import sqlite3
 from http import HTTPStatus
 from unittest import mock
 
+import pytest
 from flask import session
 from flask_login import current_user
 
 from webapp.app import User
+from webapp.utils import get_access_token_fingerprint
+from webapp.utils.history import get_run_history_store
 
 
 def test_app_request_index_success(
@@ -30,6 +35,17 @@ def test_app_login_identifies_current_user_success(
         assert current_user == authenticated_user
 
 
+def test_app_login_caches_claims_by_access_token(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    mock_parse_oidc_data.assert_called_once_with(
+        mock_request_headers_oidc_data["x-amzn-oidc-data"],
+        options={"verify_exp": False},
+        access_token=mock_request_headers_oidc_data["x-amzn-oidc-accesstoken"],
+    )
+
+
 def test_app_login_cannot_identify_user_if_missing_request_headers(
     sapinvoices_app, authenticated_user, mock_parse_oidc_data, caplog
 ):
@@ -65,6 +81,44 @@ def test_app_user_from_session_data_returns_none_if_missing_oidc_data(
         assert User.from_session_data() is None
 
 
+def test_app_login_stores_compact_session(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    mock_parse_oidc_data.return_value = {
+        **mock_parse_oidc_data.return_value,
+        "sub": "abc-123",
+        "exp": 1700000000,
+    }
+    with sapinvoices_client:
+        sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+        assert session["oidc_data"] == ["123", "Authenticated User", "auser@mit.edu"]
+        assert session["oidc_token_fp"] == get_access_token_fingerprint(
+            mock_request_headers_oidc_data["x-amzn-oidc-accesstoken"]
+        )
+        assert "oidc_access_token" not in session
+
+
+def test_app_login_skips_parsing_if_access_token_unchanged(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    mock_parse_oidc_data.assert_called_once()
+
+
+def test_app_login_drops_access_token_from_earlier_sessions(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    with sapinvoices_client.session_transaction() as legacy_session:
+        legacy_session["oidc_access_token"] = mock_request_headers_oidc_data[
+            "x-amzn-oidc-accesstoken"
+        ]
+    with sapinvoices_client:
+        sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+        assert "oidc_access_token" not in session
+        mock_parse_oidc_data.assert_called_once()
+
+
 def test_app_log_activity_executed_runs_success(
     sapinvoices_client,
     ecs_client,
@@ -101,3 +155,284 @@ def test_app_log_activity_logged_out_success(
     with sapinvoices_client:
         sapinvoices_client.get("/logout", headers=mock_request_headers_oidc_data)
         assert "Authenticated User logged out." in caplog.text
+
+
+def test_app_status_data_with_cursor_returns_new_logs(
+    sapinvoices_client,
+    ecs_client,
+    mock_cloudwatchlogs_log_stream_review_run_task,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data?cursor=",
+        headers=mock_request_headers_oidc_data,
+    )
+    data = response.json
+    assert data["status"] == "COMPLETED"
+    assert data["logs"][0].endswith("Logger 'root' configured with level=INFO")
+    assert data["logs"][-1] == "2 serial invoices retrieved and processed"
+    assert data["cursor"]
+
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data",
+        query_string={"cursor": data["cursor"]},
+        headers=mock_request_headers_oidc_data,
+    )
+    assert response.json == {
+        "status": "COMPLETED",
+        "logs": [],
+        "cursor": data["cursor"],
+    }
+
+
+@pytest.mark.usefixtures("ecs_client", "mock_cloudwatchlogs_log_stream_review_run_task")
+def test_app_status_data_with_cursor_reloads_completed_task_without_aws_calls(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    url = "/process-invoices/status/abc001/data?cursor="
+    first = sapinvoices_client.get(url, headers=mock_request_headers_oidc_data)
+    reloaded = sapinvoices_client.get(url, headers=mock_request_headers_oidc_data)
+    assert reloaded.json == first.json
+    assert reloaded.headers["Server-Timing"].startswith("aws;dur=0.0, ")
+
+
+def test_app_status_data_with_cursor_returns_expired_if_log_stream_missing(
+    sapinvoices_client,
+    ecs_client,
+    mock_cloudwatchlogs_log_group,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/status/DOES_NOT_EXIST/data?cursor=",
+        headers=mock_request_headers_oidc_data,
+    )
+    assert response.json == {
+        "status": "EXPIRED (UNKNOWN)",
+        "logs": ["Log stream expired, cannot find logs for task."],
+        "cursor": None,
+    }
+
+
+def test_app_status_stream_sends_status_logs_and_end_events(
+    sapinvoices_client,
+    ecs_client,
+    mock_cloudwatchlogs_log_stream_review_run_task,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/stream", headers=mock_request_headers_oidc_data
+    )
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-store"
+    events = response.text.split("\n\n")
+    assert 'event: status\nretry: 5000\ndata: "COMPLETED"' in events[0]
+    assert "event: logs\ndata: [" in events[1]
+    assert 'event: end\ndata: "COMPLETED"' in events[2]
+
+
+def test_app_status_stream_resumes_from_last_event_id(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    with mock.patch(
+        "webapp.utils.get_task_status_and_new_logs"
+    ) as mock_get_task_status_and_new_logs:
+        mock_get_task_status_and_new_logs.return_value = ("COMPLETED", [], "f/002")
+        sapinvoices_client.get(
+            "/process-invoices/status/abc001/stream",
+            headers={**mock_request_headers_oidc_data, "Last-Event-ID": "f/001"},
+        )
+    mock_get_task_status_and_new_logs.assert_called_once_with("abc001", "f/001")
+
+
+def test_app_execute_run_records_run_history(
+    sqlite_run_history_store,
+    sapinvoices_client,
+    ecs_client,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    with mock.patch(
+        "webapp.app.ECSClient.execute_review_run"
+    ) as mock_ecsclient_review_run:
+        mock_ecsclient_review_run.return_value = "abc123"
+        sapinvoices_client.get(
+            "/process-invoices/run/review/execute", headers=mock_request_headers_oidc_data
+        )
+    record = sqlite_run_history_store.get("abc123")
+    assert record.run_type == "review"
+    assert record.user == "Authenticated User"
+
+
+@pytest.mark.usefixtures("sqlite_run_history_store", "ecs_client")
+def test_app_execute_run_redirects_if_recording_run_history_fails(
+    sapinvoices_client,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+    caplog,
+):
+    with (
+        mock.patch("webapp.app.ECSClient.execute_review_run", return_value="abc123"),
+        mock.patch.object(
+            get_run_history_store(),
+            "record_launch",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ),
+    ):
+        response = sapinvoices_client.get(
+            "/process-invoices/run/review/execute", headers=mock_request_headers_oidc_data
+        )
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.location == "/process-invoices/status/abc123"
+    assert "Failed to record launch of task run 'abc123'." in caplog.text
+
+
+def test_app_history_lists_runs(
+    sapinvoices_client,
+    mock_cloudwatchlogs_log_streams_run_history,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/history", headers=mock_request_headers_oidc_data
+    )
+    html = response.get_data(as_text=True)
+    assert response.status_code == HTTPStatus.OK
+    assert html.index("abc105") < html.index("abc101")
+    assert "abc999" not in html
+
+
+@pytest.fixture
+def run_history_page_size(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_PAGE_SIZE", "3")
+
+
+# the page size is set before the app (and the configuration snapshot) is created
+@pytest.mark.usefixtures("run_history_page_size")
+def test_app_history_data_paginates_runs(
+    sapinvoices_client,
+    mock_cloudwatchlogs_log_streams_run_history,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/history/data", headers=mock_request_headers_oidc_data
+    )
+    assert [run["task_id"] for run in response.json["runs"]] == [
+        "abc105",
+        "abc104",
+        "abc103",
+    ]
+    assert response.json["cursor"]
+
+    response = sapinvoices_client.get(
+        "/process-invoices/history/data",
+        query_string={"cursor": response.json["cursor"]},
+        headers=mock_request_headers_oidc_data,
+    )
+    assert [run["task_id"] for run in response.json["runs"]] == ["abc102", "abc101"]
+    assert response.json["cursor"] is None
+
+
+def test_app_history_data_invalid_cursor_returns_400(
+    sapinvoices_client,
+    mock_cloudwatchlogs_log_streams_run_history,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/history/data?cursor=DOES_NOT_EXIST",
+        headers=mock_request_headers_oidc_data,
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_app_status_data_completed_is_conditional_and_immutable(
+    sapinvoices_client,
+    ecs_client,
+    mock_cloudwatchlogs_log_stream_review_run_task,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data", headers=mock_request_headers_oidc_data
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["status"] == "COMPLETED"
+    assert response.headers["ETag"]
+    assert response.cache_control.immutable
+    assert response.cache_control.private
+
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data",
+        headers={
+            **mock_request_headers_oidc_data,
+            "If-None-Match": response.headers["ETag"],
+        },
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.data == b""
+
+
+def test_app_status_data_with_cursor_is_conditional_and_not_stored(
+    sapinvoices_client,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    with mock.patch(
+        "webapp.app.get_task_status_and_new_logs"
+    ) as mock_get_task_status_and_new_logs:
+        mock_get_task_status_and_new_logs.return_value = ("RUNNING", ["Log 1"], "c1")
+        response = sapinvoices_client.get(
+            "/process-invoices/status/abc001/data?cursor=",
+            headers=mock_request_headers_oidc_data,
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.cache_control.no_store
+        etag = response.headers["ETag"]
+
+        # no new logs since the cursor
+        mock_get_task_status_and_new_logs.return_value = ("RUNNING", [], "c1")
+        response = sapinvoices_client.get(
+            "/process-invoices/status/abc001/data?cursor=c1",
+            headers={**mock_request_headers_oidc_data, "If-None-Match": etag},
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        # new logs move the cursor
+        mock_get_task_status_and_new_logs.return_value = ("RUNNING", ["Log 2"], "c2")
+        response = sapinvoices_client.get(
+            "/process-invoices/status/abc001/data?cursor=c1",
+            headers={**mock_request_headers_oidc_data, "If-None-Match": etag},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json["logs"] == ["Log 2"]
+        assert response.headers["ETag"] != etag
+
+
+@pytest.mark.usefixtures("ecs_client", "mock_cloudwatchlogs_log_stream_review_run_task")
+def test_app_status_data_adds_server_timing_of_aws_calls(
+    sapinvoices_client,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+    caplog,
+):
+    caplog.set_level("INFO")
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data", headers=mock_request_headers_oidc_data
+    )
+    server_timing = response.headers["Server-Timing"]
+    # the status is retrieved from ECS, then the logs of the completed task run
+    # from CloudWatch
+    assert "ecs.DescribeTasks;dur=" in server_timing
+    assert "logs.GetLogEvents;dur=" in server_timing
+    assert "total;dur=" in server_timing
+    request_timing = next(
+        json.loads(message)
+        for message in caplog.messages
+        if message.startswith('{"message": "Request timing"')
+    )
+    assert request_timing["path"] == "/process-invoices/status/abc001/data"
+    assert request_timing["aws_calls"] == 2  # noqa: PLR2004
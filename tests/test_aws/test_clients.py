@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from webapp.utils.aws import CloudWatchLogsClient, ECSClient, get_client
+
+
+def test_get_client_reuses_client_success():
+    assert get_client("ecs") is get_client("ecs")
+
+
+def test_get_client_shared_by_ecs_and_cloudwatchlogs_clients_success():
+    assert ECSClient().client is ECSClient().client is get_client("ecs")
+    assert CloudWatchLogsClient().client is get_client("logs")
+
+
+def test_get_client_region_and_endpoint_overrides_success():
+    default_client = get_client("logs")
+    region_client = get_client("logs", region_name="us-west-2")
+    endpoint_client = get_client("logs", endpoint_url="http://localhost:4566")
+
+    assert default_client.meta.region_name == "us-east-1"
+    assert region_client.meta.region_name == "us-west-2"
+    assert endpoint_client.meta.endpoint_url == "http://localhost:4566"
+    assert default_client is not region_client
+    assert default_client is not endpoint_client
+
+
+def test_get_client_connection_pool_config_success(monkeypatch):
+    monkeypatch.setenv("AWS_CLIENT_MAX_POOL_CONNECTIONS", "25")
+    client = get_client("ecs")
+    assert client.meta.config.max_pool_connections == 25  # noqa: PLR2004
+    assert client.meta.config.tcp_keepalive is True
+
+
+def test_get_client_is_thread_safe_success():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: get_client("ecs"), range(32)))
+    assert len({id(client) for client in clients}) == 1
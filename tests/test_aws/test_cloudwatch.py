@@ -1,6 +1,12 @@
+from datetime import timedelta
+from unittest.mock import PropertyMock, patch
+
+import boto3
 import pytest
+from moto.core.utils import unix_time_millis, utcnow
 
 from webapp.exceptions import ECSTaskLogStreamDoesNotExistError
+from webapp.utils.aws import CloudWatchLogsClient
 
 
 def test_cloudwatchlogs_client_init_success(cloudwatchlogs_client):
@@ -48,3 +54,224 @@ def test_cloudwatchlogs_client_get_log_events_raise_error(
         match=r"No log streams found for task id 'DOES_NOT_EXIST'.",
     ):
         assert cloudwatchlogs_client.get_log_events(task_id="DOES_NOT_EXIST")
+
+
+def test_cloudwatchlogs_client_get_new_log_events_resumes_from_cursor(
+    cloudwatchlogs_client,
+    cloudwatch_sapinvoices_review_run_logs,
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    log_events, cursor = cloudwatchlogs_client.get_new_log_events(task_id="abc001")
+    assert len(log_events) == len(cloudwatch_sapinvoices_review_run_logs)
+    assert cursor is not None
+
+    # no new events since cursor
+    assert cloudwatchlogs_client.get_new_log_events("abc001", cursor) == ([], cursor)
+
+    boto3.client("logs").put_log_events(
+        logGroupName="mock-sapinvoices-ecs-test",
+        logStreamName="sapinvoices/mock-sapinvoices-ecs-test/abc001",
+        logEvents=[
+            {
+                "timestamp": int(unix_time_millis(utcnow() + timedelta(minutes=5))),
+                "message": "New message",
+            }
+        ],
+    )
+    log_events, next_cursor = cloudwatchlogs_client.get_new_log_events("abc001", cursor)
+    assert [event["message"] for event in log_events] == ["New message"]
+    assert next_cursor != cursor
+
+
+def test_cloudwatchlogs_client_get_new_log_events_raise_error(
+    cloudwatchlogs_client,
+    mock_cloudwatchlogs_log_group,
+):
+    with pytest.raises(ECSTaskLogStreamDoesNotExistError):
+        cloudwatchlogs_client.get_new_log_events(task_id="DOES_NOT_EXIST")
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_tail_stops_at_marker(
+    cloudwatch_sapinvoices_review_run_logs,
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    cloudwatchlogs_client = CloudWatchLogsClient(page_size=2)
+    with patch.object(
+        cloudwatchlogs_client.client,
+        "get_log_events",
+        wraps=cloudwatchlogs_client.client.get_log_events,
+    ) as mock_get_log_events:
+        summary = cloudwatchlogs_client.get_log_summary_from_tail(task_id="abc001")
+    assert summary == cloudwatchlogs_client.get_log_summary(
+        cloudwatchlogs_client.get_log_events(task_id="abc001")
+    )
+    # summary has 5 messages, so 3 pages of 2 are read instead of the full stream
+    assert mock_get_log_events.call_count == 3  # noqa: PLR2004
+    assert all(
+        call.kwargs["startFromHead"] is False
+        for call in mock_get_log_events.call_args_list
+    )
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_last_page_success(
+    cloudwatchlogs_client, mock_cloudwatchlogs_log_stream_review_run_task
+):
+    assert cloudwatchlogs_client.get_log_summary_from_last_page(
+        task_id="abc001"
+    ) == cloudwatchlogs_client.get_log_summary_from_tail(task_id="abc001")
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_last_page_reads_one_page(
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    cloudwatchlogs_client = CloudWatchLogsClient(page_size=2)
+    with patch.object(
+        cloudwatchlogs_client.client,
+        "get_log_events",
+        wraps=cloudwatchlogs_client.client.get_log_events,
+    ) as mock_get_log_events:
+        # summary has 5 messages, so it does not start in the last page of 2
+        assert cloudwatchlogs_client.get_log_summary_from_last_page("abc001") is None
+    mock_get_log_events.assert_called_once()
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_tail_custom_markers(
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    cloudwatchlogs_client = CloudWatchLogsClient(
+        summary_markers=("serial invoices retrieved and processed",)
+    )
+    assert cloudwatchlogs_client.get_log_summary_from_tail(task_id="abc001") == [
+        "2 serial invoices retrieved and processed"
+    ]
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_tail_without_marker(
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    cloudwatchlogs_client = CloudWatchLogsClient(summary_markers=("DOES_NOT_EXIST",))
+    assert cloudwatchlogs_client.get_log_summary_from_tail(task_id="abc001") == [
+        "SAP invoice process did not complete."
+    ]
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_tail_raise_error(
+    cloudwatchlogs_client, mock_cloudwatchlogs_log_group
+):
+    with pytest.raises(ECSTaskLogStreamDoesNotExistError):
+        cloudwatchlogs_client.get_log_summary_from_tail(task_id="DOES_NOT_EXIST")
+
+
+@pytest.mark.parametrize("mode", ["tail", "filter", "full"])
+def test_cloudwatchlogs_client_get_log_messages_modes_return_same_summary(
+    cloudwatchlogs_client, mock_cloudwatchlogs_log_stream_final_run_task, mode
+):
+    assert cloudwatchlogs_client.get_log_messages(task_id="abc002", mode=mode) == [
+        "INFO sapinvoices.cli.process_invoices(): SAP invoice process completed for a final run",  # noqa: E501
+        "3 monograph invoices retrieved and processed:",
+        "2 SAP monograph invoices",
+        "1 other payment monograph invoices",
+        "2 serial invoices retrieved and processed",
+    ]
+
+
+@pytest.mark.parametrize("mode", ["tail", "filter", "full"])
+def test_cloudwatchlogs_client_get_log_messages_modes_start_at_last_repeated_marker(
+    cloudwatchlogs_client, mock_cloudwatchlogs_log_group, mode
+):
+    logs = boto3.client("logs")
+    logs.create_log_stream(
+        logGroupName=mock_cloudwatchlogs_log_group,
+        logStreamName="sapinvoices/mock-sapinvoices-ecs-test/abc005",
+    )
+    messages = [
+        "INFO sapinvoices.cli.process_invoices(): Starting SAP invoices process",
+        "INFO sapinvoices.cli.process_invoices(): SAP invoice process completed",
+        "0 monograph invoices retrieved and processed:",
+        "INFO sapinvoices.cli.process_invoices(): SAP invoice process completed",
+        "1 monograph invoices retrieved and processed:",
+    ]
+    logs.put_log_events(
+        logGroupName=mock_cloudwatchlogs_log_group,
+        logStreamName="sapinvoices/mock-sapinvoices-ecs-test/abc005",
+        logEvents=[
+            {
+                "timestamp": int(unix_time_millis(utcnow() + timedelta(seconds=count))),
+                "message": message,
+            }
+            for count, message in enumerate(messages)
+        ],
+    )
+    assert cloudwatchlogs_client.get_log_messages(task_id="abc005", mode=mode) == [
+        "INFO sapinvoices.cli.process_invoices(): SAP invoice process completed",
+        "1 monograph invoices retrieved and processed:",
+    ]
+
+
+def test_cloudwatchlogs_client_get_log_messages_raise_error_if_mode_is_invalid(
+    cloudwatchlogs_client,
+):
+    with pytest.raises(
+        ValueError, match="Cannot get log messages for unrecognized mode='invalid'"
+    ):
+        cloudwatchlogs_client.get_log_messages(task_id="abc001", mode="invalid")
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_filter_without_marker(
+    mock_cloudwatchlogs_log_stream_review_run_task,
+):
+    cloudwatchlogs_client = CloudWatchLogsClient(summary_markers=("DOES_NOT_EXIST",))
+    assert cloudwatchlogs_client.get_log_summary_from_filter(task_id="abc001") == [
+        "SAP invoice process did not complete."
+    ]
+
+
+def test_cloudwatchlogs_client_get_log_summary_from_filter_raise_error(
+    cloudwatchlogs_client, mock_cloudwatchlogs_log_group
+):
+    with pytest.raises(ECSTaskLogStreamDoesNotExistError):
+        cloudwatchlogs_client.get_log_summary_from_filter(task_id="DOES_NOT_EXIST")
+
+
+def test_cloudwatchlogs_client_list_log_streams_newest_first(
+    cloudwatchlogs_client, mock_cloudwatchlogs_log_streams_run_history
+):
+    log_streams, position = cloudwatchlogs_client.list_log_streams(max_results=10)
+    assert [log_stream["logStreamName"] for log_stream in log_streams] == [
+        f"sapinvoices/mock-sapinvoices-ecs-test/abc10{count}" for count in range(5, 0, -1)
+    ]
+    assert position is None
+
+
+def test_cloudwatchlogs_client_list_log_streams_stops_once_filled(
+    cloudwatchlogs_client,
+):
+    prefix = cloudwatchlogs_client.log_stream_name_prefix
+    pages = {
+        None: {
+            "logStreams": [
+                {"logStreamName": f"{prefix}abc103"},
+                {"logStreamName": "other/abc999"},
+                {"logStreamName": f"{prefix}abc102"},
+            ],
+            "nextToken": "page-2",
+        },
+        "page-2": {"logStreams": [{"logStreamName": f"{prefix}abc101"}]},
+    }
+    with patch.object(
+        CloudWatchLogsClient, "client", new_callable=PropertyMock
+    ) as mock_client:
+        mock_client.return_value.describe_log_streams.side_effect = (
+            lambda **params: pages[params.get("nextToken")]
+        )
+        log_streams, position = cloudwatchlogs_client.list_log_streams(1)
+        assert position == (None, 1)
+        assert mock_client.return_value.describe_log_streams.call_count == 1
+
+        log_streams, position = cloudwatchlogs_client.list_log_streams(1, *position)
+        assert log_streams == [{"logStreamName": f"{prefix}abc102"}]
+        assert position == ("page-2", 0)
+
+        log_streams, position = cloudwatchlogs_client.list_log_streams(5, *position)
+        assert log_streams == [{"logStreamName": f"{prefix}abc101"}]
+        assert position is None
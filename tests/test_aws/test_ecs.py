@@ -1,14 +1,18 @@
 # ruff: noqa: E501
 import os
+from unittest.mock import patch
 
+import attrs
 import pytest
+from botocore.exceptions import ClientError
 
+from webapp.config import get_config_snapshot
 from webapp.exceptions import (
     ECSTaskDefinitionDoesNotExistError,
     ECSTaskDoesNotExistError,
     ECSTaskRuntimeExceededTimeoutError,
 )
-from webapp.utils.aws import ECSClient
+from webapp.utils.aws import ECSClient, get_task_definition_cache
 
 
 def test_ecs_client_init_success(ecs_client):
@@ -26,6 +30,15 @@ def test_ecs_client_init_success(ecs_client):
     assert ecs_client.container == os.environ["ALMA_SAP_INVOICES_ECR_IMAGE_NAME"]
 
 
+def test_ecs_client_init_with_injected_config_success():
+    config_snapshot = attrs.evolve(
+        get_config_snapshot(), ALMA_SAP_INVOICES_ECS_CLUSTER="injected-cluster"
+    )
+    ecs_client = ECSClient(config=config_snapshot)
+    assert ecs_client.config is config_snapshot
+    assert ecs_client.cluster == "injected-cluster"
+
+
 def test_ecs_client_task_family_property_success(ecs_client):
     assert (
         ecs_client.task_definition
@@ -119,6 +132,13 @@ def test_ecs_client_monitor_task_raise_error(
         ecs_client.monitor_task(task_arn, timeout=2)
 
 
+def test_ecs_client_monitor_task_raise_error_if_task_does_not_exist(ecs_client):
+    with pytest.raises(
+        ECSTaskDoesNotExistError, match=r"No tasks found for id 'DOES_NOT_EXIST'."
+    ):
+        ecs_client.monitor_task("DOES_NOT_EXIST")
+
+
 def test_ecs_client_get_task_status_success(ecs_client, mock_ecs_task_state_transitions):
     task_arn = mock_ecs_task_state_transitions
     assert ecs_client.get_task_status(task_id=task_arn.split("/")[-1]) == "DEACTIVATING"
@@ -158,3 +178,144 @@ def test_ecs_client_task_definition_exists_returns_false(mock_ecs_task_definitio
         container="test",
     )
     assert bad_ecs_client.task_definition_exists() is False
+
+
+def test_ecs_client_get_task_status_makes_single_request(
+    ecs_client, mock_boto3_client, boto3_ecs_client_describe_tasks_response_success
+):
+    mock_boto3_client.describe_tasks.return_value = (
+        boto3_ecs_client_describe_tasks_response_success
+    )
+    assert ecs_client.get_task_status(task_id="abc123") == "PROVISIONING"
+    mock_boto3_client.describe_tasks.assert_called_once()
+    mock_boto3_client.list_tasks.assert_not_called()
+
+
+def test_ecs_client_get_task_status_raise_error_if_task_missing(
+    ecs_client, mock_boto3_client
+):
+    mock_boto3_client.describe_tasks.return_value = {
+        "tasks": [],
+        "failures": [
+            {
+                "arn": "arn:aws:ecs:us-east-1:123456789012:task/DOES_NOT_EXIST",
+                "reason": "MISSING",
+            }
+        ],
+    }
+    with pytest.raises(ECSTaskDoesNotExistError):
+        ecs_client.get_task_status(task_id="DOES_NOT_EXIST")
+    mock_boto3_client.describe_tasks.assert_called_once()
+    mock_boto3_client.list_tasks.assert_not_called()
+
+
+def test_ecs_client_get_tasks_success(ecs_client, mock_ecs_task_state_transitions):
+    assert ecs_client.get_tasks() == [mock_ecs_task_state_transitions]
+
+
+def test_ecs_client_get_tasks_follows_every_page(ecs_client, mock_boto3_client):
+    mock_boto3_client.get_paginator.return_value.paginate.side_effect = lambda **kwargs: [
+        {"taskArns": [f"{kwargs['desiredStatus']}-1"]},
+        {"taskArns": [f"{kwargs['desiredStatus']}-2"]},
+    ]
+    assert sorted(ecs_client.get_tasks()) == [
+        "PENDING-1",
+        "PENDING-2",
+        "RUNNING-1",
+        "RUNNING-2",
+        "STOPPED-1",
+        "STOPPED-2",
+    ]
+
+
+def test_ecs_client_get_active_tasks_lists_running_tasks_only(
+    ecs_client, mock_boto3_client
+):
+    mock_boto3_client.get_paginator.return_value.paginate.return_value = [
+        {"taskArns": []}
+    ]
+    assert ecs_client.get_active_tasks() is None
+    mock_boto3_client.get_paginator.return_value.paginate.assert_called_once_with(
+        cluster=ecs_client.cluster,
+        family=ecs_client.task_family,
+        desiredStatus="RUNNING",
+    )
+    mock_boto3_client.describe_tasks.assert_not_called()
+
+
+def test_ecs_client_describe_tasks_in_batches_of_100(ecs_client, mock_boto3_client):
+    mock_boto3_client.describe_tasks.side_effect = lambda **kwargs: {
+        "tasks": [{"taskArn": task} for task in kwargs["tasks"]]
+    }
+    tasks = [f"task-{index}" for index in range(250)]
+    assert [task["taskArn"] for task in ecs_client.describe_tasks(tasks)] == tasks
+    assert sorted(
+        len(call.kwargs["tasks"])
+        for call in mock_boto3_client.describe_tasks.call_args_list
+    ) == [50, 100, 100]
+
+
+def test_ecs_client_task_definition_is_valid_caches_result(
+    ecs_client, mock_ecs_task_definition
+):
+    with patch.object(
+        ECSClient, "task_definition_exists", return_value=True
+    ) as mock_task_definition_exists:
+        assert ecs_client.task_definition_is_valid() is True
+        assert ecs_client.task_definition_is_valid() is True
+    mock_task_definition_exists.assert_called_once()
+
+
+def test_ecs_client_task_definition_is_valid_does_not_cache_missing_definition(
+    ecs_client,
+):
+    with patch.object(
+        ECSClient, "task_definition_exists", return_value=False
+    ) as mock_task_definition_exists:
+        assert ecs_client.task_definition_is_valid() is False
+        assert ecs_client.task_definition_is_valid() is False
+    assert mock_task_definition_exists.call_count == 2  # noqa: PLR2004
+
+
+def test_ecs_client_run_invalidates_cached_task_definition_if_run_fails(
+    ecs_client, mock_boto3_client
+):
+    mock_boto3_client.exceptions.ClientException = ClientError
+    mock_boto3_client.exceptions.InvalidParameterException = ClientError
+    mock_boto3_client.run_task.side_effect = ClientError(
+        {"Error": {"Code": "ClientException", "Message": "Unable to find"}}, "RunTask"
+    )
+    get_task_definition_cache().set(ecs_client.task_definition, value=True)
+    with (
+        patch.object(ECSClient, "task_definition_exists", return_value=False),
+        pytest.raises(ECSTaskDefinitionDoesNotExistError),
+    ):
+        ecs_client.run(run_type="review")
+    assert ecs_client.task_definition not in get_task_definition_cache()
+
+
+def test_ecs_client_preflight_returns_active_tasks(
+    ecs_client, ecs_client_get_active_tasks_success
+):
+    with patch.object(
+        ECSClient, "task_definition_exists", return_value=True
+    ) as mock_task_definition_exists:
+        assert ecs_client.preflight() == {"abc123": "2024-07-29T17:16:13.688000-04:00"}
+        ecs_client.task_definition_is_valid()
+    mock_task_definition_exists.assert_called_once()
+
+
+def test_ecs_client_preflight_raise_error_if_task_definition_does_not_exist(
+    mock_ecs_task_definition,
+):
+    bad_ecs_client = ECSClient(
+        cluster="test",
+        task_definition="DOES_NOT_EXIST",
+        network_configuration="test",
+        container="test",
+    )
+    with (
+        patch.object(ECSClient, "get_active_tasks", return_value=None),
+        pytest.raises(ECSTaskDefinitionDoesNotExistError),
+    ):
+        bad_ecs_client.preflight()
@@ -0,0 +1,111 @@
+import asyncio
+from unittest import mock
+
+import boto3
+import pytest
+
+from webapp.exceptions import ECSTaskRuntimeExceededTimeoutError
+from webapp.utils.aws import ECSClient, TaskMonitor
+from webapp.utils.aws.monitor import POLL_INTERVALS, main
+
+
+@pytest.fixture
+def fast_poll_intervals():
+    return dict.fromkeys(POLL_INTERVALS, (0, 0))
+
+
+@pytest.fixture
+def mock_ecs_task_ids(mock_ecs_task_state_transitions, mock_ecs_network_config):
+    ecs = boto3.client("ecs", region_name="us-east-1")
+    response = ecs.run_task(
+        cluster="mock-sapinvoices-ecs-test",
+        launchType="FARGATE",
+        networkConfiguration=mock_ecs_network_config,
+        overrides={},
+        taskDefinition="mock-sapinvoices-ecs-test:1",
+    )
+    return [
+        mock_ecs_task_state_transitions.split("/")[-1],
+        response["tasks"][0]["taskArn"].split("/")[-1],
+    ]
+
+
+def test_task_monitor_watches_tasks_with_batched_requests(
+    ecs_client, mock_ecs_task_ids, fast_poll_intervals
+):
+    status_changes = []
+    stopped_tasks = []
+    monitor = TaskMonitor(
+        ecs_client=ecs_client,
+        poll_intervals=fast_poll_intervals,
+        on_status_change=lambda task_id, status: status_changes.append((task_id, status)),
+        on_stopped=lambda task_id, _: stopped_tasks.append(task_id),
+    )
+    with mock.patch(
+        "webapp.utils.aws.ECSClient.describe_tasks",
+        autospec=True,
+        side_effect=ECSClient.describe_tasks,
+    ) as mock_describe_tasks:
+        stopped = asyncio.run(monitor.watch(mock_ecs_task_ids))
+
+    assert set(stopped) == set(stopped_tasks) == set(mock_ecs_task_ids)
+    assert all(task["lastStatus"] == "STOPPED" for task in stopped.values())
+    for task_id in mock_ecs_task_ids:
+        assert [status for id_, status in status_changes if id_ == task_id][-1] == (
+            "STOPPED"
+        )
+    # a single request per check describes every watched task
+    first_call_tasks = mock_describe_tasks.call_args_list[0].args[1]
+    assert sorted(first_call_tasks) == sorted(mock_ecs_task_ids)
+    assert mock_describe_tasks.call_count == len({status for _, status in status_changes})
+
+
+def test_task_monitor_awaits_async_callbacks(
+    ecs_client, mock_ecs_task_state_transitions, fast_poll_intervals
+):
+    stopped_tasks = []
+
+    async def on_stopped(task_id, task):
+        await asyncio.sleep(0)
+        stopped_tasks.append((task_id, task["lastStatus"]))
+
+    monitor = TaskMonitor(
+        ecs_client=ecs_client, poll_intervals=fast_poll_intervals, on_stopped=on_stopped
+    )
+    task_id = mock_ecs_task_state_transitions.split("/")[-1]
+    asyncio.run(monitor.watch([mock_ecs_task_state_transitions]))
+    assert stopped_tasks == [(task_id, "STOPPED")]
+
+
+def test_task_monitor_reports_missing_tasks_as_stopped(ecs_client):
+    stopped_tasks = []
+    monitor = TaskMonitor(
+        ecs_client=ecs_client,
+        on_stopped=lambda task_id, task: stopped_tasks.append((task_id, task)),
+    )
+    assert asyncio.run(monitor.watch(["DOES_NOT_EXIST"])) == {"DOES_NOT_EXIST": None}
+    assert stopped_tasks == [("DOES_NOT_EXIST", None)]
+
+
+def test_task_monitor_raise_error_if_timeout_exceeded(
+    ecs_client, mock_ecs_task_state_transitions
+):
+    monitor = TaskMonitor(ecs_client=ecs_client, timeout=0)
+    with pytest.raises(ECSTaskRuntimeExceededTimeoutError):
+        asyncio.run(monitor.watch([mock_ecs_task_state_transitions]))
+
+
+def test_task_monitor_get_poll_interval_is_lifecycle_aware():
+    monitor = TaskMonitor(ecs_client=mock.Mock())
+    assert monitor.get_poll_interval([("PENDING", 0)]) == 1
+    assert monitor.get_poll_interval([("RUNNING", 0)]) == 10  # noqa: PLR2004
+    # backs off while the status does not change, up to the maximum interval
+    assert monitor.get_poll_interval([("RUNNING", 1)]) == 15  # noqa: PLR2004
+    assert monitor.get_poll_interval([("RUNNING", 100)]) == 60  # noqa: PLR2004
+    # the task that needs it soonest determines the next check
+    assert monitor.get_poll_interval([("RUNNING", 3), ("PENDING", 0)]) == 1
+
+
+def test_task_monitor_cli_missing_task_exits_with_error(ecs_client, capsys):
+    assert main(["DOES_NOT_EXIST"]) == 1
+    assert "DOES_NOT_EXIST: not found in ECS task history" in capsys.readouterr().out
@@ -0,0 +1,87 @@
+from webapp.utils.cache import TTLCache, get_cache_stats
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_get_and_set_success():
+    cache = TTLCache()
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    assert cache.get("b") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2  # noqa: PLR2004
+
+
+def test_ttl_cache_entries_expire():
+    timer = FakeTimer()
+    cache = TTLCache(ttl=10, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+    timer.now = 11
+    assert cache.get("a") is None
+    assert cache.get("b") == 2  # noqa: PLR2004
+
+
+def test_ttl_cache_returns_stale_entry_if_allowed():
+    timer = FakeTimer()
+    cache = TTLCache(ttl=10, timer=timer)
+    cache.set("a", 1)
+    timer.now = 11
+    assert cache.get("a", allow_stale=True) == 1
+
+
+def test_ttl_cache_delete_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert "a" not in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_stats_counts_hits_and_misses():
+    cache = TTLCache(maxsize=10)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {
+        "size": 1,
+        "maxsize": 10,
+        "hits": 2,
+        "misses": 1,
+        "hit_ratio": 2 / 3,
+    }
+    cache.clear()
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_get_cache_stats_reports_named_caches():
+    cache = TTLCache(name="test_cache")
+    TTLCache()
+    cache.get("a")
+    assert get_cache_stats()["test_cache"]["misses"] == 1
+    assert None not in get_cache_stats()
+
+
+def test_get_cache_stats_omits_deleted_caches():
+    cache = TTLCache(name="test_cache")
+    del cache
+    assert "test_cache" not in get_cache_stats()
@@ -0,0 +1,127 @@
+import gzip
+import json
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+
+from webapp.utils.compression import get_supported_encodings
+
+# a realistic payload: the log messages of a long, verbose run
+VERBOSE_RUN_LOGS = [
+    f"INFO sapinvoices.sap: Processing invoice {index} for vendor {index % 50}"
+    for index in range(5000)
+]
+
+
+@pytest.fixture
+def mock_verbose_run_new_logs():
+    with mock.patch(
+        "webapp.app.get_task_status_and_new_logs"
+    ) as mock_get_task_status_and_new_logs:
+        mock_get_task_status_and_new_logs.return_value = (
+            "RUNNING",
+            VERBOSE_RUN_LOGS,
+            "c1",
+        )
+        yield mock_get_task_status_and_new_logs
+
+
+@pytest.fixture
+def mock_brotli():
+    with mock.patch("webapp.utils.compression.brotli") as mock_brotli:
+        mock_brotli.compress.return_value = b"compressed"
+        yield mock_brotli
+
+
+@pytest.mark.usefixtures("mock_verbose_run_new_logs")
+def test_compress_response_gzip_reduces_size_of_log_payload(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    uncompressed_response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data?cursor=",
+        headers={**mock_request_headers_oidc_data, "Accept-Encoding": "identity"},
+    )
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data?cursor=",
+        headers={**mock_request_headers_oidc_data, "Accept-Encoding": "gzip"},
+    )
+    assert "Content-Encoding" not in uncompressed_response.headers
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert json.loads(gzip.decompress(response.data))["logs"] == VERBOSE_RUN_LOGS
+
+    # the compressed payload is a fraction of the size of the uncompressed payload
+    assert len(response.data) < len(uncompressed_response.data) / 10
+
+
+@pytest.mark.usefixtures("mock_verbose_run_new_logs")
+def test_compress_response_prefers_brotli_if_installed(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data, mock_brotli
+):
+    assert get_supported_encodings() == ["br", "gzip"]
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data?cursor=",
+        headers={**mock_request_headers_oidc_data, "Accept-Encoding": "gzip, br"},
+    )
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.data == b"compressed"
+    mock_brotli.compress.assert_called_once()
+
+
+@pytest.mark.usefixtures("mock_verbose_run_new_logs")
+def test_compress_response_falls_back_to_gzip_if_brotli_not_installed(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    with mock.patch("webapp.utils.compression.brotli", None):
+        assert get_supported_encodings() == ["gzip"]
+        response = sapinvoices_client.get(
+            "/process-invoices/status/abc001/data?cursor=",
+            headers={**mock_request_headers_oidc_data, "Accept-Encoding": "gzip, br"},
+        )
+    assert response.headers["Content-Encoding"] == "gzip"
+
+
+def test_compress_response_skips_small_responses(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    with mock.patch("webapp.app.get_task_status_and_new_logs") as mock_get_logs:
+        mock_get_logs.return_value = ("RUNNING", ["Log 1"], "c1")
+        response = sapinvoices_client.get(
+            "/process-invoices/status/abc001/data?cursor=",
+            headers={**mock_request_headers_oidc_data, "Accept-Encoding": "gzip"},
+        )
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+
+
+def test_compress_response_skips_event_streams(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    with mock.patch("webapp.app.stream_task_status_and_logs") as mock_stream:
+        mock_stream.return_value = iter(["event: end\ndata: null\n\n" * 200])
+        response = sapinvoices_client.get(
+            "/process-invoices/status/abc001/stream",
+            headers={**mock_request_headers_oidc_data, "Accept-Encoding": "gzip"},
+        )
+    assert response.is_streamed
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.usefixtures("mock_verbose_run_new_logs")
+def test_compress_response_weakens_etag_and_honors_if_none_match(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    headers = {**mock_request_headers_oidc_data, "Accept-Encoding": "gzip"}
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data?cursor=", headers=headers
+    )
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    response = sapinvoices_client.get(
+        "/process-invoices/status/abc001/data?cursor=",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
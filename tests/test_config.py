@@ -1,8 +1,14 @@
 import logging
 
+import attrs
 import pytest
 
-from webapp.config import configure_logger, configure_sentry
+from webapp.config import (
+    ConfigSnapshot,
+    configure_logger,
+    configure_sentry,
+    get_config_snapshot,
+)
 
 
 def test_config_check_required_env_vars_success(config):
@@ -64,3 +70,52 @@ def test_config_env_access_network_config_success(monkeypatch, config):
             "assignPublicIp": "DISABLED",
         }
     }
+
+
+def test_config_snapshot_from_config_success(monkeypatch):
+    monkeypatch.setenv("COMPRESSION_MIN_SIZE", "512")
+    config_snapshot = ConfigSnapshot.from_config()
+    assert config_snapshot.WORKSPACE == "test"
+    assert config_snapshot.COMPRESSION_MIN_SIZE == 512  # noqa: PLR2004
+    assert config_snapshot.LOGIN_DISABLED is False
+    assert config_snapshot.ALMA_SAP_INVOICES_ECS_NETWORK_CONFIG["awsvpcConfiguration"][
+        "subnets"
+    ] == ["subnet-abc123", "subnet-def456"]
+
+
+def test_config_snapshot_is_frozen():
+    config_snapshot = ConfigSnapshot.from_config()
+    with pytest.raises(attrs.exceptions.FrozenInstanceError):
+        config_snapshot.WORKSPACE = "prod"  # type: ignore[misc]
+
+
+def test_config_snapshot_missing_required_env_vars_error(monkeypatch):
+    monkeypatch.delenv("WORKSPACE")
+    with pytest.raises(OSError, match="Missing required environment variables"):
+        ConfigSnapshot.from_config()
+
+
+def test_config_snapshot_invalid_value_error(monkeypatch):
+    monkeypatch.setenv("SSE_POLL_INTERVAL", "often")
+    with pytest.raises(ValueError, match="Invalid value for SSE_POLL_INTERVAL"):
+        ConfigSnapshot.from_config()
+
+
+def test_config_snapshot_invalid_run_history_store_error(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_STORE", "dynamodb")
+    with pytest.raises(ValueError, match="'RUN_HISTORY_STORE' must be in"):
+        ConfigSnapshot.from_config()
+
+
+def test_config_snapshot_s3_run_history_store_without_bucket_error(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_STORE", "s3")
+    monkeypatch.delenv("RUN_HISTORY_S3_BUCKET", raising=False)
+    with pytest.raises(ValueError, match="RUN_HISTORY_S3_BUCKET is required"):
+        ConfigSnapshot.from_config()
+
+
+def test_get_config_snapshot_ignores_later_env_var_changes(monkeypatch):
+    config_snapshot = get_config_snapshot()
+    monkeypatch.setenv("WORKSPACE", "prod")
+    assert get_config_snapshot() is config_snapshot
+    assert get_config_snapshot().WORKSPACE == "test"
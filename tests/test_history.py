@@ -0,0 +1,207 @@
+import sqlite3
+from datetime import UTC, datetime
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from webapp.utils import (
+    get_completed_task_result,
+    get_task_status_and_logs,
+    set_completed_task_result,
+)
+from webapp.utils.history import (
+    RunRecord,
+    S3RunHistoryStore,
+    SQLiteRunHistoryStore,
+    get_run_history_store,
+)
+
+
+def test_get_run_history_store_returns_none_if_not_configured():
+    assert get_run_history_store() is None
+
+
+def test_get_run_history_store_sqlite_success(sqlite_run_history_store):
+    assert isinstance(sqlite_run_history_store, SQLiteRunHistoryStore)
+
+
+def test_get_run_history_store_s3_success(mock_s3_run_history_bucket):
+    run_history_store = get_run_history_store()
+    assert isinstance(run_history_store, S3RunHistoryStore)
+    assert run_history_store.bucket == mock_s3_run_history_bucket
+    assert run_history_store.prefix == "run-history/"
+
+
+def test_get_run_history_store_raise_error_if_invalid(monkeypatch):
+    monkeypatch.setenv("RUN_HISTORY_STORE", "invalid")
+    with pytest.raises(ValueError, match="'RUN_HISTORY_STORE' must be in"):
+        get_run_history_store()
+
+
+@pytest.mark.usefixtures("mock_s3_run_history_bucket")
+@pytest.mark.parametrize(
+    "run_history_store",
+    [
+        SQLiteRunHistoryStore(),
+        S3RunHistoryStore(bucket="mock-sapinvoices-run-history"),
+    ],
+)
+def test_run_history_store_records_launch_and_completion(run_history_store):
+    assert run_history_store.get("abc123") is None
+
+    run_history_store.record_launch("abc123", "review", "Authenticated User")
+    record = run_history_store.get("abc123")
+    assert record.run_type == "review"
+    assert record.user == "Authenticated User"
+    assert record.started_at
+    assert record.status is None
+
+    run_history_store.record_completion(
+        "abc123",
+        "COMPLETED",
+        ["Summary"],
+        stopped_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC),
+    )
+    assert run_history_store.get("abc123") == RunRecord(
+        task_id="abc123",
+        run_type="review",
+        user="Authenticated User",
+        started_at=record.started_at,
+        stopped_at="2026-01-02T03:04:05+00:00",
+        status="COMPLETED",
+        summary=["Summary"],
+    )
+
+
+def test_run_history_store_does_not_rewrite_completed_run(sqlite_run_history_store):
+    sqlite_run_history_store.record_completion("abc123", "COMPLETED", ["Summary"])
+    with mock.patch.object(sqlite_run_history_store, "put") as mock_put:
+        record = sqlite_run_history_store.record_completion(
+            "abc123", "COMPLETED", ["Other summary"]
+        )
+    assert record.summary == ["Summary"]
+    mock_put.assert_not_called()
+
+
+@pytest.mark.parametrize("error_code", ["NoSuchKey", "AccessDenied"])
+def test_s3_run_history_store_get_returns_none_if_key_is_not_readable(
+    mock_s3_run_history_bucket, error_code
+):
+    run_history_store = S3RunHistoryStore(bucket=mock_s3_run_history_bucket)
+    with mock.patch.object(
+        run_history_store.client,
+        "get_object",
+        side_effect=ClientError({"Error": {"Code": error_code}}, "GetObject"),
+    ):
+        assert run_history_store.get("abc123") is None
+
+
+def test_s3_run_history_store_get_raise_error_if_request_fails(
+    mock_s3_run_history_bucket,
+):
+    run_history_store = S3RunHistoryStore(bucket=mock_s3_run_history_bucket)
+    with (
+        mock.patch.object(
+            run_history_store.client,
+            "get_object",
+            side_effect=ClientError({"Error": {"Code": "SlowDown"}}, "GetObject"),
+        ),
+        pytest.raises(ClientError),
+    ):
+        run_history_store.get("abc123")
+
+
+def test_set_completed_task_result_caches_result_if_recording_run_history_fails(
+    sqlite_run_history_store, caplog
+):
+    with mock.patch.object(
+        sqlite_run_history_store,
+        "record_completion",
+        side_effect=sqlite3.OperationalError("database is locked"),
+    ):
+        set_completed_task_result("abc001", ["Summary"])
+    assert get_completed_task_result("abc001") == ("COMPLETED", ["Summary"])
+    assert "Failed to record completion of task run 'abc001'." in caplog.text
+
+
+def test_get_task_status_and_logs_reads_logs_if_reading_run_history_fails(
+    sqlite_run_history_store, caplog
+):
+    with (
+        mock.patch.object(
+            sqlite_run_history_store,
+            "get",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ),
+        mock.patch("webapp.utils.ECSClient.describe_task", return_value=None),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages",
+            return_value=["Summary"],
+        ),
+    ):
+        assert get_task_status_and_logs("abc001", speculative=False) == (
+            "COMPLETED",
+            ["Summary"],
+        )
+    assert "Failed to read run history of task run 'abc001'." in caplog.text
+
+
+def test_get_task_status_and_logs_records_and_reads_run_history(
+    sqlite_run_history_store, ecs_client, mock_cloudwatchlogs_log_stream_review_run_task
+):
+    task_status, logs = get_task_status_and_logs("abc001")
+    assert sqlite_run_history_store.get("abc001").summary == logs
+
+    # a new container (empty task result cache) resolves the run from history
+    # once ECS no longer knows the task
+    with (
+        mock.patch("webapp.utils.get_task_result_cache") as mock_get_task_result_cache,
+        mock.patch("webapp.utils.ECSClient") as mock_ecs_client,
+        mock.patch("webapp.utils.CloudWatchLogsClient") as mock_cloudwatchlogs_client,
+    ):
+        mock_get_task_result_cache.return_value.get.return_value = None
+        mock_ecs_client.return_value.describe_task.return_value = None
+        assert get_task_status_and_logs("abc001", speculative=False) == (
+            task_status,
+            logs,
+        )
+    mock_cloudwatchlogs_client.return_value.get_log_messages.assert_not_called()
+
+
+def test_get_task_status_and_logs_records_stop_time_of_ecs_task(
+    sqlite_run_history_store,
+):
+    with (
+        mock.patch(
+            "webapp.utils.ECSClient.describe_task",
+            return_value={
+                "lastStatus": "STOPPED",
+                "stoppedAt": datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC),
+            },
+        ),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages",
+            return_value=["Summary"],
+        ),
+    ):
+        get_task_status_and_logs("abc001", speculative=False)
+    assert (
+        sqlite_run_history_store.get("abc001").stopped_at == "2026-01-02T03:04:05+00:00"
+    )
+
+
+def test_get_task_status_and_logs_does_not_read_run_history_of_active_task(
+    sqlite_run_history_store,
+):
+    with (
+        mock.patch.object(sqlite_run_history_store, "get") as mock_get,
+        mock.patch(
+            "webapp.utils.ECSClient.describe_task", return_value={"lastStatus": "RUNNING"}
+        ),
+    ):
+        assert get_task_status_and_logs("abc001", speculative=False) == (
+            "RUNNING",
+            ["Loading."],
+        )
+    mock_get.assert_not_called()
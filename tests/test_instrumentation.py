@@ -0,0 +1,89 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from botocore.exceptions import ClientError
+
+from webapp.utils.aws import get_client
+from webapp.utils.instrumentation import (
+    AWSCall,
+    ContextThreadPoolExecutor,
+    format_server_timing,
+    log_request_timing,
+    start_recording_aws_calls,
+    stop_recording_aws_calls,
+    summarize_aws_calls,
+)
+
+
+@pytest.fixture
+def aws_calls():
+    return [
+        AWSCall("ecs", "DescribeTasks", 0.010),
+        AWSCall("logs", "GetLogEvents", 0.020),
+        AWSCall("logs", "GetLogEvents", 0.005),
+    ]
+
+
+def test_recording_aws_calls_records_client_calls(mock_ecs_cluster):
+    calls = start_recording_aws_calls()
+    get_client("ecs").list_clusters()
+    assert stop_recording_aws_calls() is calls
+    assert [(call.service, call.operation, call.failed) for call in calls] == [
+        ("ecs", "ListClusters", False)
+    ]
+    assert calls[0].duration > 0
+
+
+def test_recording_aws_calls_marks_error_responses_as_failed(mock_ecs_cluster):
+    start_recording_aws_calls()
+    with pytest.raises(ClientError):
+        get_client("ecs").describe_task_definition(taskDefinition="DOES_NOT_EXIST")
+    assert [call.failed for call in stop_recording_aws_calls()] == [True]
+
+
+def test_recording_aws_calls_ignores_calls_if_not_started(mock_ecs_cluster):
+    get_client("ecs").list_clusters()
+    assert stop_recording_aws_calls() == []
+
+
+def test_context_thread_pool_executor_records_calls_made_in_threads(mock_ecs_cluster):
+    calls = start_recording_aws_calls()
+    with ContextThreadPoolExecutor(max_workers=2) as executor:
+        for _ in range(2):
+            executor.submit(get_client("ecs").list_clusters)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(get_client("ecs").list_clusters)
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+def test_summarize_aws_calls_success(aws_calls):
+    summary = summarize_aws_calls(aws_calls)
+    assert list(summary) == ["ecs.DescribeTasks", "logs.GetLogEvents"]
+    assert summary["logs.GetLogEvents"] == (2, pytest.approx(0.025))
+
+
+def test_format_server_timing_success(aws_calls):
+    assert format_server_timing(aws_calls, total=0.05) == (
+        'ecs.DescribeTasks;dur=10.0;desc="1 call", '
+        'logs.GetLogEvents;dur=25.0;desc="2 calls", '
+        "aws;dur=35.0, total;dur=50.0"
+    )
+
+
+def test_format_server_timing_without_aws_calls():
+    assert format_server_timing([], total=0.001) == "aws;dur=0.0, total;dur=1.0"
+
+
+def test_log_request_timing_logs_single_json_line(aws_calls, caplog):
+    caplog.set_level(logging.INFO)
+    log_request_timing("GET", "/", 200, 0.05, aws_calls)
+    assert len(caplog.records) == 1
+    log = json.loads(caplog.messages[0])
+    assert log["message"] == "Request timing"
+    assert log["aws_calls"] == 3  # noqa: PLR2004
+    assert log["aws_operations"]["logs.GetLogEvents"] == {
+        "calls": 2,
+        "duration_ms": 25.0,
+    }
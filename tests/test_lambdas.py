@@ -1,4 +1,11 @@
+import base64
+import gzip
 import json
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
 
 import lambdas
 
@@ -20,3 +27,68 @@ def test_lambda_handler_logs_warning_if_event_not_json_serializble(
     bad_event["bad_item"] = Exception("I can't be serialized")
     _ = lambdas.lambda_handler(bad_event, {})
     assert "Object of type Exception is not JSON serializable" in caplog.text
+
+
+def test_lambda_handler_reuses_app_across_warm_invocations(
+    lambda_function_event_payload, mock_parse_oidc_data
+):
+    with patch("lambdas.create_app", wraps=lambdas.create_app) as mock_create_app:
+        lambdas.lambda_handler(lambda_function_event_payload, {})
+        lambdas.lambda_handler(lambda_function_event_payload, {})
+    mock_create_app.assert_called_once()
+
+
+def test_lambda_handler_retries_setup_if_cold_start_fails(
+    lambda_function_event_payload, mock_parse_oidc_data, monkeypatch
+):
+    monkeypatch.delenv("WORKSPACE")
+    with pytest.raises(OSError, match="Missing required environment variables"):
+        lambdas.lambda_handler(lambda_function_event_payload, {})
+
+    monkeypatch.setenv("WORKSPACE", "test")
+    response = lambdas.lambda_handler(lambda_function_event_payload, {})
+    assert response["statusCode"] == 200  # noqa: PLR2004
+
+
+def test_lambda_handler_writes_metrics_once_per_invocation(
+    lambda_function_event_payload, mock_parse_oidc_data, capsys
+):
+    lambdas.lambda_handler(lambda_function_event_payload, {})
+    lambdas.lambda_handler(lambda_function_event_payload, {})
+    documents = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if line.startswith('{"_aws"')
+    ]
+    assert [document["ColdStart"] for document in documents] == [1, 0]
+    assert documents[0]["Route"] == "/"
+    assert len(documents[0]["Latency"]) == 1
+
+
+def test_lambda_handler_base64_encodes_compressed_responses(
+    lambda_function_event_payload, mock_parse_oidc_data
+):
+    lambda_function_event_payload["rawPath"] = "/process-invoices"
+    lambda_function_event_payload["requestContext"]["http"]["path"] = "/process-invoices"
+    lambda_function_event_payload["headers"]["accept-encoding"] = "gzip"
+    response = lambdas.lambda_handler(lambda_function_event_payload, {})
+    assert response["headers"]["content-encoding"] == "gzip"
+    assert response["isBase64Encoded"]
+    html = gzip.decompress(base64.b64decode(response["body"])).decode()
+    assert "Process invoices" in html
+
+
+def test_lambdas_import_does_not_load_aws_jwt_or_sentry_dependencies():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, lambdas; print(','.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    loaded_modules = set(result.stdout.strip().split(","))
+    for module in ("boto3", "botocore", "jwt", "cryptography", "requests", "sentry_sdk"):
+        assert module not in loaded_modules
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from webapp.metrics import (
+    flush_metrics,
+    format_emf_documents,
+    record_request,
+    start_invocation,
+)
+from webapp.utils.cache import TTLCache
+from webapp.utils.instrumentation import AWSCall
+
+
+@pytest.fixture(autouse=True)
+def _stop_collecting_metrics():
+    yield
+    flush_metrics()
+
+
+@pytest.fixture
+def aws_calls():
+    return [
+        AWSCall("ecs", "DescribeTasks", 0.010),
+        AWSCall("logs", "GetLogEvents", 0.020),
+        AWSCall("logs", "GetLogEvents", 0.005),
+    ]
+
+
+def test_flush_metrics_writes_single_emf_document_per_invocation(aws_calls, capsys):
+    start_invocation(cold_start=True)
+    record_request("/process-invoices/status/<task_id>/data", 200, 0.05, aws_calls)
+    record_request("/process-invoices/status/<task_id>/data", 304, 0.02, [])
+    documents = flush_metrics()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    document = json.loads(lines[0])
+    assert document == documents[0]
+    assert document["_aws"]["CloudWatchMetrics"][0]["Namespace"] == "SAPInvoicesUI"
+    assert document["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [["Route"]]
+    assert document["Route"] == "/process-invoices/status/<task_id>/data"
+    assert document["ColdStart"] == 1
+    assert document["Latency"] == [50.0, 20.0]
+    assert document["AWSCalls"] == [3, 0]
+    assert document["logs.GetLogEvents.Calls"] == [2]
+    assert document["logs.GetLogEvents.Latency"] == [25.0]
+
+
+def test_flush_metrics_declares_unit_of_every_metric(aws_calls):
+    start_invocation(cold_start=False)
+    record_request("/", 200, 0.05, aws_calls)
+    document = flush_metrics()[0]
+    units = {
+        metric["Name"]: metric["Unit"]
+        for metric in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]
+    }
+    assert set(units) == set(document) - {"_aws", "Route"}
+    assert units["ColdStart"] == "Count"
+    assert units["Latency"] == units["ecs.DescribeTasks.Latency"] == "Milliseconds"
+    assert units["ecs.DescribeTasks.Calls"] == "Count"
+
+
+def test_flush_metrics_stops_collecting(capsys):
+    start_invocation(cold_start=False)
+    record_request("/", 200, 0.05, [])
+    flush_metrics()
+    record_request("/", 200, 0.05, [])
+    assert flush_metrics() == []
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+
+def test_record_request_outside_invocation_is_ignored(capsys):
+    record_request("/", 200, 0.05, [])
+    assert flush_metrics() == []
+    assert capsys.readouterr().out == ""
+
+
+def test_format_emf_documents_reports_cache_hit_ratio_of_invocation():
+    cache = TTLCache(name="test_cache")
+    cache.set("a", 1)
+    cache.get("b")
+    invocation = start_invocation(cold_start=False)
+    record_request("/", 200, 0.05, [])
+    for key in ("a", "a", "a", "b"):
+        cache.get(key)
+    document = format_emf_documents(
+        invocation,
+        namespace="test",
+        cache_stats={"test_cache": cache.stats(), "idle_cache": TTLCache().stats()},
+    )[0]
+    assert document["test_cache.HitRatio"] == 75.0  # noqa: PLR2004
+    assert "idle_cache.HitRatio" not in document
+
+
+def test_format_emf_documents_one_document_per_route():
+    invocation = start_invocation(cold_start=False)
+    record_request("/", 200, 0.05, [])
+    record_request("/process-invoices", 200, 0.05, [])
+    documents = format_emf_documents(invocation, namespace="test", cache_stats={})
+    assert [document["Route"] for document in documents] == ["/", "/process-invoices"]
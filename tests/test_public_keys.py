@@ -0,0 +1,80 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from webapp.utils.public_keys import PublicKeyCache, get_public_key_cache
+
+
+@pytest.fixture
+def public_key_cache():
+    return PublicKeyCache(region="us-east-1")
+
+
+@pytest.fixture
+def mock_public_key_response():
+    response = MagicMock()
+    response.text = "-----BEGIN PUBLIC KEY-----abc-----END PUBLIC KEY-----"
+    return response
+
+
+def test_public_key_cache_fetches_key_once(public_key_cache, mock_public_key_response):
+    with patch.object(
+        requests.Session, "get", return_value=mock_public_key_response
+    ) as mock_get:
+        assert public_key_cache.get("kid-1") == mock_public_key_response.text
+        assert public_key_cache.get("kid-1") == mock_public_key_response.text
+    mock_get.assert_called_once_with(
+        "https://public-keys.auth.elb.us-east-1.amazonaws.com/kid-1", timeout=5
+    )
+
+
+def test_public_key_cache_concurrent_fetches_are_single_flight(
+    public_key_cache, mock_public_key_response
+):
+    def slow_get(*_args, **_kwargs):
+        time.sleep(0.2)
+        return mock_public_key_response
+
+    with patch.object(requests.Session, "get", side_effect=slow_get) as mock_get:
+        threads = [
+            threading.Thread(target=public_key_cache.get, args=("kid-1",))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    mock_get.assert_called_once()
+
+
+def test_public_key_cache_returns_stale_key_if_fetch_fails(
+    mock_public_key_response, caplog
+):
+    public_key_cache = PublicKeyCache(region="us-east-1", ttl=0)
+    with patch.object(requests.Session, "get", return_value=mock_public_key_response):
+        public_key_cache.get("kid-1")
+    with patch.object(requests.Session, "get", side_effect=requests.Timeout("timeout")):
+        assert public_key_cache.get("kid-1") == mock_public_key_response.text
+    assert "Failed to refresh public key 'kid-1', using cached key" in caplog.text
+
+
+def test_public_key_cache_raises_error_if_fetch_fails_without_cached_key(
+    public_key_cache,
+):
+    with (
+        patch.object(requests.Session, "get", side_effect=requests.Timeout("timeout")),
+        pytest.raises(requests.Timeout),
+    ):
+        public_key_cache.get("kid-1")
+
+
+def test_get_public_key_cache_uses_config(monkeypatch):
+    monkeypatch.setenv("ALB_PUBLIC_KEY_FETCH_TIMEOUT", "2")
+    get_public_key_cache.cache_clear()
+    public_key_cache = get_public_key_cache()
+    assert public_key_cache.region == "us-east-1"
+    assert public_key_cache.timeout == 2  # noqa: PLR2004
+    assert get_public_key_cache() is public_key_cache
@@ -0,0 +1,96 @@
+import gzip
+import re
+import shutil
+from http import HTTPStatus
+
+import pytest
+
+from webapp.utils.static_assets import get_asset_fingerprint, precompress_static_assets
+
+
+@pytest.fixture(autouse=True)
+def _reset_asset_fingerprints():
+    get_asset_fingerprint.cache_clear()
+    yield
+    get_asset_fingerprint.cache_clear()
+
+
+@pytest.fixture
+def precompressed_static_folder(sapinvoices_app, tmp_path):
+    static_folder = tmp_path / "static"
+    shutil.copytree(sapinvoices_app.static_folder, static_folder)
+    precompress_static_assets(str(static_folder))
+    sapinvoices_app.static_folder = str(static_folder)
+    return static_folder
+
+
+def get_stylesheet_url(response) -> str:
+    return re.search(r'href="(/assets/[^"]+/libraries-main.min.css)"', response.text)[1]
+
+
+def test_templates_use_fingerprinted_asset_urls(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    response = sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    assert re.search(r'href="/assets/[0-9a-f]{16}/libraries-main.min.css"', response.text)
+    assert re.search(
+        r'href="/assets/[0-9a-f]{16}/libraries-additional.min.css"', response.text
+    )
+
+
+def test_static_asset_is_immutable(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    page = sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    response = sapinvoices_client.get(get_stylesheet_url(page))
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "text/css"
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 31536000  # noqa: PLR2004
+    with open("webapp/static/libraries-main.min.css", "rb") as file:
+        assert response.data == file.read()
+
+
+def test_static_asset_outdated_fingerprint_redirects(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    page = sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    response = sapinvoices_client.get("/assets/0000000000000000/libraries-main.min.css")
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.location == get_stylesheet_url(page)
+    assert not response.cache_control.immutable
+
+
+def test_static_asset_missing_returns_404(sapinvoices_client):
+    response = sapinvoices_client.get("/assets/0000000000000000/does-not-exist.css")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_precompress_static_assets_writes_smaller_variants(tmp_path):
+    (tmp_path / "style.css").write_text("body { color: black; }\n" * 100)
+    (tmp_path / "image.png").write_bytes(b"\x89PNG" * 100)
+    assert precompress_static_assets(str(tmp_path)) == [str(tmp_path / "style.css.gz")]
+    assert (
+        gzip.decompress((tmp_path / "style.css.gz").read_bytes())
+        == (tmp_path / "style.css").read_bytes()
+    )
+
+
+@pytest.mark.usefixtures("precompressed_static_folder")
+def test_static_asset_sends_precompressed_variant(
+    sapinvoices_client, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    page = sapinvoices_client.get("/", headers=mock_request_headers_oidc_data)
+    url = get_stylesheet_url(page)
+    response = sapinvoices_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert response.mimetype == "text/css"
+    with open("webapp/static/libraries-main.min.css", "rb") as file:
+        original = file.read()
+    assert gzip.decompress(response.data) == original
+    assert len(response.data) < len(original) / 3
+
+    response = sapinvoices_client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.data == original
@@ -0,0 +1,79 @@
+import os
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
+
+import jinja2
+import pytest
+
+from webapp import create_app
+from webapp.utils.templates import compile_templates
+
+
+@pytest.fixture
+def template_bytecode_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "template_cache"))
+    return tmp_path / "template_cache"
+
+
+def test_compile_templates_writes_bytecode_of_every_template(
+    template_bytecode_cache_dir,
+):
+    template_names = compile_templates(create_app())
+    assert "base.html" in template_names
+    assert "process_invoices_status.html" in template_names
+    assert len(os.listdir(template_bytecode_cache_dir)) == len(template_names)
+
+
+def test_app_loads_precompiled_templates_without_compiling(
+    template_bytecode_cache_dir,
+    mock_parse_oidc_data,
+    mock_request_headers_oidc_data,
+):
+    # compiled as when the image is built, without creating the app
+    compile_templates()
+
+    app = create_app()
+    with mock.patch.object(
+        jinja2.Environment, "compile", wraps=app.jinja_env.compile
+    ) as mock_compile:
+        response = app.test_client().get(
+            "/process-invoices", headers=mock_request_headers_oidc_data
+        )
+    assert "Process invoices" in response.text
+    mock_compile.assert_not_called()
+
+
+def test_app_renders_templates_if_bytecode_cache_is_not_writable(
+    monkeypatch, tmp_path, mock_parse_oidc_data, mock_request_headers_oidc_data
+):
+    monkeypatch.setenv("TEMPLATE_BYTECODE_CACHE_DIR", str(tmp_path / "does-not-exist"))
+    response = (
+        create_app()
+        .test_client()
+        .get("/process-invoices", headers=mock_request_headers_oidc_data)
+    )
+    assert "Process invoices" in response.text
+
+
+def test_dockerfile_compiles_templates_without_required_env_vars(tmp_path):
+    project_dir = Path(__file__).parent.parent
+    command = next(
+        line.removeprefix("RUN ")
+        for line in (project_dir / "Dockerfile").read_text().splitlines()
+        if line.startswith("RUN ") and "compile_templates" in line
+    )
+    _, _, code = shlex.split(command)
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        cwd=project_dir,
+        env={
+            "PATH": os.environ["PATH"],
+            "TEMPLATE_BYTECODE_CACHE_DIR": str(tmp_path / "template_cache"),
+        },
+        check=True,
+    )
+    template_paths = list((project_dir / "webapp" / "templates").rglob("*.html"))
+    assert len(os.listdir(tmp_path / "template_cache")) == len(template_paths)
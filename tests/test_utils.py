@@ -0,0 +1,404 @@
+import threading
+import time
+from unittest import mock
+
+import jwt
+import pytest
+
+from webapp.utils import (
+    EMPTY_CURSOR_EVENT_ID,
+    format_server_sent_event,
+    get_access_token_fingerprint,
+    get_completed_task_logs_cache,
+    get_oidc_claims_cache,
+    get_run_history_page,
+    get_task_result_cache,
+    get_task_status_and_logs,
+    get_task_status_and_new_logs,
+    parse_oidc_data,
+    stream_task_status_and_logs,
+)
+from webapp.utils.aws import CloudWatchLogsClient
+
+
+@pytest.fixture
+def mock_get_task_status_and_new_logs():
+    with mock.patch(
+        "webapp.utils.get_task_status_and_new_logs"
+    ) as mock_get_task_status_and_new_logs:
+        yield mock_get_task_status_and_new_logs
+
+
+@pytest.fixture
+def mock_sleep():
+    with mock.patch("webapp.utils.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+def test_format_server_sent_event_success():
+    assert format_server_sent_event(["a"], event="logs", event_id="f/001") == (
+        'id: f/001\nevent: logs\ndata: ["a"]\n\n'
+    )
+    assert format_server_sent_event("RUNNING") == 'data: "RUNNING"\n\n'
+    assert format_server_sent_event("RUNNING", retry=5000) == (
+        'retry: 5000\ndata: "RUNNING"\n\n'
+    )
+
+
+def test_stream_task_status_and_logs_sends_transitions_until_terminal_status(
+    mock_get_task_status_and_new_logs, mock_sleep
+):
+    mock_get_task_status_and_new_logs.side_effect = [
+        ("PENDING", [], None),
+        ("RUNNING", ["a"], "f/001"),
+        ("RUNNING", [], "f/001"),
+        ("COMPLETED", ["b"], "f/002"),
+    ]
+    events = list(stream_task_status_and_logs("abc123", max_duration=60))
+    assert events == [
+        'id: -\nevent: status\nretry: 5000\ndata: "PENDING"\n\n',
+        'id: f/001\nevent: status\ndata: "RUNNING"\n\n',
+        'id: f/001\nevent: logs\ndata: ["a"]\n\n',
+        'id: f/002\nevent: status\ndata: "COMPLETED"\n\n',
+        'id: f/002\nevent: logs\ndata: ["b"]\n\n',
+        'id: f/002\nevent: end\ndata: "COMPLETED"\n\n',
+    ]
+    assert mock_sleep.call_count == 3  # noqa: PLR2004
+
+
+def test_stream_task_status_and_logs_closes_after_max_duration(
+    mock_get_task_status_and_new_logs, mock_sleep
+):
+    mock_get_task_status_and_new_logs.return_value = ("RUNNING", [], "f/001")
+    events = list(
+        stream_task_status_and_logs("abc123", "f/001", poll_interval=5, max_duration=4)
+    )
+    assert events == ['id: f/001\nevent: status\nretry: 5000\ndata: "RUNNING"\n\n']
+    mock_sleep.assert_not_called()
+
+
+def test_stream_task_status_and_logs_buffered_new_connection_closes_after_first_poll(
+    mock_get_task_status_and_new_logs, mock_sleep
+):
+    mock_get_task_status_and_new_logs.return_value = ("RUNNING", ["a"], "f/001")
+    events = list(stream_task_status_and_logs("abc123", max_duration=60, buffered=True))
+    assert len(events) == 2  # noqa: PLR2004
+    mock_sleep.assert_not_called()
+
+
+def test_stream_task_status_and_logs_buffered_reconnection_without_logs_stays_open(
+    mock_get_task_status_and_new_logs, mock_sleep
+):
+    mock_get_task_status_and_new_logs.return_value = ("PENDING", [], None)
+    with mock.patch("webapp.utils.time.monotonic", side_effect=[0, 0, 5, 10]):
+        events = list(
+            stream_task_status_and_logs(
+                "abc123", EMPTY_CURSOR_EVENT_ID, max_duration=12, buffered=True
+            )
+        )
+    assert events == ['id: -\nevent: status\nretry: 5000\ndata: "PENDING"\n\n']
+    mock_get_task_status_and_new_logs.assert_called_with("abc123", None)
+    assert mock_sleep.call_count == 2  # noqa: PLR2004
+
+
+def test_get_task_status_and_logs_caches_completed_task_results(
+    ecs_client, mock_cloudwatchlogs_log_stream_review_run_task
+):
+    task_status, logs = get_task_status_and_logs("abc001")
+    assert task_status == "COMPLETED"
+
+    with (
+        mock.patch("webapp.utils.ECSClient") as mock_ecs_client,
+        mock.patch("webapp.utils.CloudWatchLogsClient") as mock_cloudwatchlogs_client,
+    ):
+        assert get_task_status_and_logs("abc001") == (task_status, logs)
+    mock_ecs_client.return_value.describe_task.assert_not_called()
+    mock_cloudwatchlogs_client.return_value.get_log_messages.assert_not_called()
+    assert get_task_result_cache().stats()["hits"] == 1
+
+
+def test_get_task_status_and_logs_does_not_cache_active_task_results(
+    ecs_client, mock_ecs_task_state_transitions
+):
+    task_id = mock_ecs_task_state_transitions.split("/")[-1]
+    assert get_task_status_and_logs(task_id) == ("DEACTIVATING", ["Loading."])
+    assert task_id not in get_task_result_cache()
+
+
+def test_get_task_status_and_new_logs_caches_logs_of_completed_task(
+    ecs_client, mock_cloudwatchlogs_log_stream_review_run_task
+):
+    task_status, logs, cursor = get_task_status_and_new_logs("abc001")
+    assert task_status == "COMPLETED"
+
+    with (
+        mock.patch("webapp.utils.ECSClient") as mock_ecs_client,
+        mock.patch("webapp.utils.CloudWatchLogsClient") as mock_cloudwatchlogs_client,
+    ):
+        assert get_task_status_and_new_logs("abc001") == (task_status, logs, cursor)
+        assert get_task_status_and_new_logs("abc001", cursor) == (
+            task_status,
+            [],
+            cursor,
+        )
+    mock_ecs_client.return_value.get_task_status.assert_not_called()
+    mock_cloudwatchlogs_client.return_value.get_new_log_events.assert_not_called()
+
+
+def test_get_task_status_and_new_logs_does_not_cache_logs_read_from_cursor(
+    ecs_client, mock_cloudwatchlogs_log_stream_review_run_task
+):
+    _, _, cursor = get_task_status_and_new_logs("abc001")
+    get_completed_task_logs_cache().clear()
+    assert get_task_status_and_new_logs("abc001", cursor) == ("COMPLETED", [], cursor)
+    assert "abc001" not in get_completed_task_logs_cache()
+
+
+def test_get_task_status_and_new_logs_does_not_cache_empty_logs_of_completed_task():
+    with (
+        mock.patch("webapp.utils.ECSClient.get_task_status", return_value="STOPPED"),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_new_log_events",
+            return_value=([], "f/001"),
+        ),
+    ):
+        assert get_task_status_and_new_logs("abc001") == ("COMPLETED", [], "f/001")
+    assert "abc001" not in get_completed_task_logs_cache()
+
+
+def test_get_completed_task_logs_cache_is_sized_by_its_own_setting(monkeypatch):
+    monkeypatch.setenv("COMPLETED_TASK_LOGS_CACHE_SIZE", "4")
+    assert get_completed_task_logs_cache().maxsize == 4  # noqa: PLR2004
+
+
+def test_get_task_status_and_new_logs_runs_lookups_concurrently():
+    # each lookup waits for the other: the barrier breaks unless both run at once
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_task_status(*_args):
+        barrier.wait()
+        return "RUNNING"
+
+    def get_new_log_events(*_args):
+        barrier.wait()
+        return [{"message": "a"}], "f/001"
+
+    with (
+        mock.patch("webapp.utils.ECSClient.get_task_status", side_effect=get_task_status),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_new_log_events",
+            side_effect=get_new_log_events,
+        ),
+    ):
+        assert get_task_status_and_new_logs("abc001") == ("RUNNING", ["a"], "f/001")
+
+
+def test_get_task_status_and_logs_speculative_runs_lookups_concurrently():
+    # each lookup waits for the other: the barrier breaks unless both run at once
+    barrier = threading.Barrier(2, timeout=5)
+
+    def describe_task(*_args):
+        barrier.wait()
+        return {"lastStatus": "STOPPED"}
+
+    def get_log_summary_from_last_page(*_args):
+        barrier.wait()
+        return ["Summary"]
+
+    with (
+        mock.patch("webapp.utils.ECSClient.describe_task", side_effect=describe_task),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_summary_from_last_page",
+            side_effect=get_log_summary_from_last_page,
+        ),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages"
+        ) as mock_get_log_messages,
+    ):
+        result = get_task_status_and_logs("abc001", speculative=True)
+    assert result == ("COMPLETED", ["Summary"])
+    mock_get_log_messages.assert_not_called()
+
+
+def test_get_task_status_and_logs_speculative_reads_logs_if_not_in_last_page():
+    with (
+        mock.patch(
+            "webapp.utils.ECSClient.describe_task", return_value={"lastStatus": "STOPPED"}
+        ),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_summary_from_last_page",
+            return_value=None,
+        ),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages",
+            return_value=["Summary"],
+        ),
+    ):
+        result = get_task_status_and_logs("abc001", speculative=True)
+    assert result == ("COMPLETED", ["Summary"])
+
+
+def test_get_task_status_and_logs_not_speculative_runs_lookups_in_sequence():
+    task_described = threading.Event()
+
+    def describe_task(*_args):
+        task_described.set()
+        return {"lastStatus": "STOPPED"}
+
+    def get_log_messages(*_args):
+        assert task_described.is_set()
+        return ["Summary"]
+
+    with (
+        mock.patch("webapp.utils.ECSClient.describe_task", side_effect=describe_task),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages",
+            side_effect=get_log_messages,
+        ),
+    ):
+        result = get_task_status_and_logs("abc001", speculative=False)
+    assert result == ("COMPLETED", ["Summary"])
+
+
+def test_get_task_status_and_logs_speculative_discards_logs_of_active_task():
+    last_page_requested = threading.Event()
+    last_page_retrieved = threading.Event()
+
+    def describe_task(*_args):
+        last_page_requested.wait(timeout=5)
+        return {"lastStatus": "RUNNING"}
+
+    def get_log_summary_from_last_page(*_args):
+        last_page_requested.set()
+        time.sleep(0.1)
+        last_page_retrieved.set()
+        return ["Summary"]
+
+    with (
+        mock.patch("webapp.utils.ECSClient.describe_task", side_effect=describe_task),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_summary_from_last_page",
+            side_effect=get_log_summary_from_last_page,
+        ),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages"
+        ) as mock_get_log_messages,
+    ):
+        assert get_task_status_and_logs("abc001", speculative=True) == (
+            "RUNNING",
+            ["Loading."],
+        )
+        # the request for the last page does not outlive the call
+        assert last_page_retrieved.is_set()
+    mock_get_log_messages.assert_not_called()
+
+
+def test_get_task_status_and_logs_not_speculative_skips_logs_of_active_task():
+    with (
+        mock.patch(
+            "webapp.utils.ECSClient.describe_task", return_value={"lastStatus": "RUNNING"}
+        ),
+        mock.patch(
+            "webapp.utils.CloudWatchLogsClient.get_log_messages"
+        ) as mock_get_log_messages,
+    ):
+        assert get_task_status_and_logs("abc001", speculative=False) == (
+            "RUNNING",
+            ["Loading."],
+        )
+    mock_get_log_messages.assert_not_called()
+
+
+@pytest.mark.usefixtures("mock_cloudwatchlogs_log_streams_run_history")
+def test_get_run_history_page_paginates_runs_newest_first():
+    runs, cursor = get_run_history_page(page_size=2)
+    assert [run["task_id"] for run in runs] == ["abc105", "abc104"]
+    assert runs[0]["started_at"]
+    assert runs[0]["last_event_at"] > runs[1]["last_event_at"]
+    assert cursor
+
+    runs, cursor = get_run_history_page(cursor, page_size=2)
+    assert [run["task_id"] for run in runs] == ["abc103", "abc102"]
+
+    runs, cursor = get_run_history_page(cursor, page_size=2)
+    assert [run["task_id"] for run in runs] == ["abc101"]
+    assert cursor is None
+
+
+@pytest.mark.usefixtures("mock_cloudwatchlogs_log_streams_run_history")
+def test_get_run_history_page_caches_pages():
+    with mock.patch(
+        "webapp.utils.CloudWatchLogsClient.list_log_streams",
+        autospec=True,
+        side_effect=CloudWatchLogsClient.list_log_streams,
+    ) as mock_list_log_streams:
+        first_page, cursor = get_run_history_page(page_size=2)
+        assert get_run_history_page(page_size=2) == (first_page, cursor)
+        assert mock_list_log_streams.call_count == 1
+        get_run_history_page(cursor, page_size=2)
+        assert mock_list_log_streams.call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures("mock_cloudwatchlogs_log_streams_run_history")
+@pytest.mark.parametrize("cursor", ["DOES_NOT_EXIST", "WzEsIC0xXQ=="])
+def test_get_run_history_page_raise_error_if_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match=f"Invalid run history cursor: '{cursor}'"):
+        get_run_history_page(cursor)
+
+
+def test_parse_oidc_data_success(encoded_oidc_jwt, mock_oidc_public_key):
+    claims = parse_oidc_data(encoded_oidc_jwt)
+    assert claims["mit_id"] == "123"
+    mock_oidc_public_key.get.assert_called_once_with("abc")
+
+
+def test_parse_oidc_data_caches_claims_by_access_token(
+    oidc_access_token, encoded_oidc_jwt, mock_oidc_public_key
+):
+    claims = parse_oidc_data(encoded_oidc_jwt, access_token=oidc_access_token)
+    with mock.patch("jwt.decode") as mock_decode:
+        assert parse_oidc_data(encoded_oidc_jwt, access_token=oidc_access_token) == claims
+    mock_decode.assert_not_called()
+    mock_oidc_public_key.get.assert_called_once_with("abc")
+    cache_key = get_access_token_fingerprint(oidc_access_token)
+    assert get_oidc_claims_cache().get(cache_key) == claims
+
+
+def test_parse_oidc_data_verifies_claims_for_other_access_token(
+    oidc_access_token, encoded_oidc_jwt, mock_oidc_public_key
+):
+    parse_oidc_data(encoded_oidc_jwt, access_token=oidc_access_token)
+    parse_oidc_data(encoded_oidc_jwt, access_token=oidc_access_token + "def")
+    assert mock_oidc_public_key.get.call_count == 2  # noqa: PLR2004
+
+
+def test_parse_oidc_data_does_not_cache_expired_claims(
+    oidc_access_token, oidc_signing_key, mock_oidc_public_key
+):
+    encoded_jwt = jwt.encode(
+        {"mit_id": "123", "exp": int(time.time()) - 60},
+        oidc_signing_key,
+        algorithm="ES256",
+        headers={"kid": "abc"},
+    )
+    parse_oidc_data(encoded_jwt, {"verify_exp": False}, access_token=oidc_access_token)
+    assert len(get_oidc_claims_cache()) == 0
+
+
+def test_parse_oidc_data_cached_claims_expire(
+    oidc_access_token, monkeypatch, encoded_oidc_jwt, mock_oidc_public_key
+):
+    parse_oidc_data(encoded_oidc_jwt, access_token=oidc_access_token)
+    later = time.monotonic() + 3600
+    monkeypatch.setattr(get_oidc_claims_cache(), "timer", lambda: later)
+    parse_oidc_data(
+        encoded_oidc_jwt, {"verify_exp": False}, access_token=oidc_access_token
+    )
+    assert mock_oidc_public_key.get.call_count == 2  # noqa: PLR2004
+
+
+def test_get_access_token_fingerprint_is_short_and_stable(oidc_access_token):
+    fingerprint = get_access_token_fingerprint(oidc_access_token * 400)
+    assert len(fingerprint) == 22  # noqa: PLR2004
+    assert fingerprint == get_access_token_fingerprint(oidc_access_token * 400)
+    assert fingerprint != get_access_token_fingerprint(oidc_access_token)
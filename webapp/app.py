@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import time
 from typing import TYPE_CHECKING
@@ -8,11 +10,13 @@ from flask import (
     Flask,
     Request,
     abort,
+    g,
     jsonify,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 from flask_login import (
@@ -25,14 +29,34 @@ from flask_login import (
 if TYPE_CHECKING:
     from werkzeug.wrappers.response import Response
 
-from webapp.config import Config
+from webapp.config import get_config_snapshot
 from webapp.exceptions import ECSTaskLogStreamDoesNotExistError
-from webapp.utils import get_task_status_and_logs, log_activity, parse_oidc_data
+from webapp.metrics import record_request
+from webapp.utils import (
+    get_access_token_fingerprint,
+    get_run_history_page,
+    get_task_status_and_logs,
+    get_task_status_and_new_logs,
+    log_activity,
+    parse_oidc_data,
+    record_run_launch,
+    stream_task_status_and_logs,
+)
 from webapp.utils.aws import ECSClient
+from webapp.utils.compression import compress_response
+from webapp.utils.instrumentation import (
+    format_server_timing,
+    log_request_timing,
+    start_recording_aws_calls,
+    stop_recording_aws_calls,
+)
+from webapp.utils.static_assets import asset_url, send_static_asset
+from webapp.utils.templates import init_template_bytecode_cache
 
 logger = logging.getLogger(__name__)
 
-CONFIG = Config()
+# OIDC claims kept in the Flask session (in this order) to identify the user
+SESSION_OIDC_CLAIMS = ("mit_id", "name", "preferred_username")
 
 
 class User(UserMixin):
@@ -52,19 +76,24 @@ class User(UserMixin):
 
     @classmethod
     def from_session_data(cls) -> User | None:
+        """Create a User from the compact OIDC data in the Flask session.
+
+        The session holds only the claims in SESSION_OIDC_CLAIMS (as a list, in
+        that order), see load_user_from_request.
+        """
         oidc_data = session.get("oidc_data")
         if oidc_data is None:
             return None
-        return cls(
-            mit_id=oidc_data["mit_id"],
-            name=oidc_data["name"],
-            email=oidc_data["preferred_username"],
-        )
+        mit_id, name, email = oidc_data
+        return cls(mit_id=mit_id, name=name, email=email)
 
 
 def create_app() -> Flask:
+    config = get_config_snapshot()
     app = Flask(__name__)
-    app.config.update(LOGIN_DISABLED=CONFIG.LOGIN_DISABLED, SECRET_KEY=CONFIG.SECRET_KEY)
+    app.config.update(LOGIN_DISABLED=config.LOGIN_DISABLED, SECRET_KEY=config.SECRET_KEY)
+    # load templates compiled when the image was built (see compile_templates)
+    init_template_bytecode_cache(app, config.TEMPLATE_BYTECODE_CACHE_DIR)
 
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -80,14 +109,21 @@ def create_app() -> Flask:
         * Retrieve OpenID Connect (OIDC) access tokens and user data from request headers.
            * If access tokens or user data are missing from the request headers,
              user cannot login.
-        * Stores active access tokens and user data in the Flask session.
+        * Stores the fingerprint of the active access token and user data in the
+          Flask session.
         * Create or refresh a User instance with parsed user data from OIDC.
 
-        An expired access token is marked by a mismatch between the OIDC
-        access token retrieved from the request header and the access token
-        currently stored in the Flask session. If there is a mismatch,
+        An expired access token is marked by a mismatch between the fingerprint
+        of the OIDC access token retrieved from the request header and the
+        fingerprint currently stored in the Flask session. If there is a mismatch,
         the method will parse the updated OIDC data in the request header
         and refresh the User instance with the updated user data.
+
+        The Flask session is a signed cookie sent with every request (including
+        every status poll), so it only holds the fingerprint of the access token
+        (see get_access_token_fingerprint) and the claims needed to identify the
+        user (see SESSION_OIDC_CLAIMS), rather than the access token and every
+        claim.
         """
         oidc_access_token = request.headers.get("x-amzn-oidc-accesstoken")
         oidc_jwt_data = request.headers.get("x-amzn-oidc-data")
@@ -106,13 +142,64 @@ def create_app() -> Flask:
             return None
 
         # get user data if new session or refresh user data when access token expires
-        if oidc_access_token != session.get("oidc_access_token"):
-            oidc_data = parse_oidc_data(oidc_jwt_data, options={"verify_exp": False})
+        oidc_token_fingerprint = get_access_token_fingerprint(oidc_access_token)
+        if oidc_token_fingerprint != session.get("oidc_token_fp"):
+            oidc_data = parse_oidc_data(
+                oidc_jwt_data,
+                options={"verify_exp": False},
+                access_token=oidc_access_token,
+            )
+            # drop the access token stored by sessions created by earlier versions
+            session.pop("oidc_access_token", None)
             session.update(
-                {"oidc_access_token": oidc_access_token, "oidc_data": oidc_data}
+                {
+                    "oidc_token_fp": oidc_token_fingerprint,
+                    "oidc_data": [oidc_data[claim] for claim in SESSION_OIDC_CLAIMS],
+                }
             )
         return User.from_session_data()
 
+    @app.before_request
+    def start_request_timing() -> None:
+        g.request_start = time.perf_counter()
+        start_recording_aws_calls()
+
+    @app.after_request
+    def add_request_timing(response: Response) -> Response:
+        """Expose the duration and AWS calls of the request.
+
+        The AWS calls made while handling the request (see
+        start_recording_aws_calls) are added to a 'Server-Timing' header, shown
+        by browser developer tools, logged as a single JSON line and added to the
+        metrics of the Lambda invocation (see record_request). Registered before
+        the 'compress' hook so that it runs after it, and the duration includes
+        compression. Calls made while a streamed response is sent (e.g.,
+        server-sent events) are not included.
+        """
+        duration = time.perf_counter() - g.request_start
+        calls = stop_recording_aws_calls()
+        response.headers["Server-Timing"] = format_server_timing(calls, total=duration)
+        log_request_timing(
+            request.method, request.path, response.status_code, duration, calls
+        )
+        record_request(
+            request.url_rule.rule if request.url_rule else "<unmatched>",
+            response.status_code,
+            duration,
+            calls,
+        )
+        return response
+
+    @app.after_request
+    def compress(response: Response) -> Response:
+        return compress_response(response, request, min_size=config.COMPRESSION_MIN_SIZE)
+
+    app.add_template_global(asset_url)
+
+    @app.route("/assets/<fingerprint>/<path:filename>")
+    def static_asset(fingerprint: str, filename: str) -> Response:
+        return send_static_asset(fingerprint, filename)
+
     @app.route("/")
     @login_required
     def index() -> str:
@@ -141,7 +228,7 @@ def create_app() -> Flask:
     @login_required
     def process_invoices_run_execute(run_type: str) -> str | Response:
         ecs_client = ECSClient()
-        if active_tasks := ecs_client.get_active_tasks():
+        if active_tasks := ecs_client.preflight():
             return render_template(
                 "errors/error_400_cannot_run_multiple_tasks.html",
                 active_tasks=active_tasks,
@@ -161,9 +248,34 @@ def create_app() -> Flask:
         else:
             return abort(400, description=f"Invalid run type: '{run_type}'")
         task_id = task_arn.split("/")[-1]  # type: ignore[union-attr]
+        record_run_launch(task_id, run_type)
         log_activity(f"executed a '{run_type}' run (task ID = '{task_id}').")
         return redirect(url_for("process_invoices_status", task_id=task_id))
 
+    @app.route("/process-invoices/history")
+    @login_required
+    def process_invoices_history() -> str:
+        try:
+            runs, cursor = get_run_history_page(request.args.get("cursor"))
+        except ValueError as exception:
+            return abort(400, description=str(exception))
+        return render_template("process_invoices_history.html", runs=runs, cursor=cursor)
+
+    @app.route("/process-invoices/history/data")
+    @login_required
+    def process_invoices_history_data() -> Response:
+        """Get a page of the run history as JSON.
+
+        Runs are listed newest first. The 'cursor' returned with each page is passed
+        as the 'cursor' query parameter to get the next page; it is null on the
+        last page.
+        """
+        try:
+            runs, cursor = get_run_history_page(request.args.get("cursor"))
+        except ValueError as exception:
+            return abort(400, description=str(exception))
+        return jsonify({"runs": runs, "cursor": cursor})
+
     @app.route("/process-invoices/status/<task_id>")
     @login_required
     def process_invoices_status(task_id: str) -> str:
@@ -184,14 +296,76 @@ def create_app() -> Flask:
     @app.route("/process-invoices/status/<task_id>/data")
     @login_required
     def process_invoices_status_data(task_id: str) -> Response:
-        t_0 = time.time()
+        """Get the status and logs of a task run as JSON.
+
+        If the 'cursor' query parameter is provided (an empty value reads from the
+        start of the log stream), only log messages written since the cursor are
+        returned, along with the cursor for the next request. Otherwise, the
+        summary of the logs is returned once the task run has completed.
+
+        Responses are conditional (see make_status_data_response): if nothing has
+        changed since the response identified by the 'If-None-Match' header,
+        an empty "304 Not Modified" response is returned.
+        """
+        if "cursor" in request.args:
+            task_status, logs, cursor = get_task_status_and_new_logs(
+                task_id, request.args["cursor"] or None
+            )
+            return make_status_data_response(
+                {"status": task_status, "logs": logs, "cursor": cursor},
+                etag_data=[task_status, cursor],
+            )
+
         try:
             task_status, logs = get_task_status_and_logs(task_id)
         except ECSTaskLogStreamDoesNotExistError:
             task_status = "UNKNOWN"
             logs = ["Log stream does not exist."]
-        logger.info(f"Data route elapsed: {time.time()-t_0}")
-        return jsonify({"status": task_status, "logs": logs})
+        return make_status_data_response(
+            {"status": task_status, "logs": logs}, etag_data=[task_status, logs]
+        )
+
+    def make_status_data_response(data: dict, etag_data: list) -> Response:
+        """Make a conditional JSON response with the status and logs of a task run.
+
+        The strong ETag is a hash of 'etag_data': the status and the log cursor
+        (which only moves when new log messages are written) or, without a cursor,
+        the status and the logs. Responses for "COMPLETED" task runs never change
+        and may be cached by the browser; other responses must not be stored, so
+        clients send the 'If-None-Match' header themselves.
+        """
+        response = jsonify(data)
+        response.set_etag(hashlib.sha256(json.dumps(etag_data).encode()).hexdigest()[:32])
+        if data["status"] == "COMPLETED":
+            response.cache_control.private = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_store = True
+        return response.make_conditional(request)
+
+    @app.route("/process-invoices/status/<task_id>/stream")
+    @login_required
+    def process_invoices_status_stream(task_id: str) -> Response:
+        """Stream the status and new logs of a task run as server-sent events.
+
+        The stream resumes from the cursor in the 'Last-Event-ID' header (set by
+        the browser when reconnecting) or the 'cursor' query parameter. Clients
+        that do not support server-sent events can poll the JSON data endpoint.
+        """
+        cursor = request.headers.get("Last-Event-ID") or request.args.get("cursor")
+        events = stream_task_status_and_logs(
+            task_id,
+            cursor or None,
+            poll_interval=config.SSE_POLL_INTERVAL,
+            max_duration=config.SSE_MAX_STREAM_DURATION,
+            buffered="apig_wsgi.full_event" in request.environ,
+        )
+        return app.response_class(
+            stream_with_context(events),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        )
 
     @app.route("/logout")
     @login_required
@@ -207,7 +381,7 @@ def create_app() -> Flask:
         """
         log_activity("logged out.")
         # clear parsed OIDC data from the session
-        session.pop("oidc_access_token", None)
+        session.pop("oidc_token_fp", None)
         session.pop("user", None)
 
         # Flask-Login's command for logging out a user
@@ -2,9 +2,11 @@
 
 import logging
 import os
+from functools import cache
 from typing import Any
 
-import sentry_sdk
+from attrs import field, fields, frozen
+from attrs.validators import in_
 
 logger = logging.getLogger("__name__")
 
@@ -22,7 +24,29 @@ class Config:
         "WORKSPACE",
         "SENTRY_DSN",
     )
-    OPTIONAL_ENV_VARS = ("AWS_DEFAULT_REGION",)
+    OPTIONAL_ENV_VARS = (
+        "ALB_PUBLIC_KEY_CACHE_TTL",
+        "ALB_PUBLIC_KEY_FETCH_TIMEOUT",
+        "AWS_DEFAULT_REGION",
+        "AWS_CLIENT_MAX_POOL_CONNECTIONS",
+        "AWS_CLIENT_TCP_KEEPALIVE",
+        "COMPLETED_TASK_LOGS_CACHE_SIZE",
+        "COMPRESSION_MIN_SIZE",
+        "ECS_TASK_DEFINITION_CACHE_TTL",
+        "METRICS_NAMESPACE",
+        "OIDC_CLAIMS_CACHE_SIZE",
+        "RUN_HISTORY_PAGE_SIZE",
+        "RUN_HISTORY_STORE",
+        "RUN_HISTORY_SQLITE_PATH",
+        "RUN_HISTORY_S3_BUCKET",
+        "RUN_HISTORY_S3_PREFIX",
+        "RUN_INDEX_CACHE_TTL",
+        "SPECULATIVE_LOG_FETCH",
+        "SSE_MAX_STREAM_DURATION",
+        "SSE_POLL_INTERVAL",
+        "TASK_RESULT_CACHE_SIZE",
+        "TEMPLATE_BYTECODE_CACHE_DIR",
+    )
 
     def __getattr__(self, name: str) -> Any:
         """Method to raise exception if required env vars not set."""
@@ -43,10 +67,38 @@ class Config:
             }
         }
 
+    @property
+    def ALB_PUBLIC_KEY_CACHE_TTL(self) -> float:
+        return float(os.getenv("ALB_PUBLIC_KEY_CACHE_TTL", "3600"))
+
+    @property
+    def ALB_PUBLIC_KEY_FETCH_TIMEOUT(self) -> float:
+        return float(os.getenv("ALB_PUBLIC_KEY_FETCH_TIMEOUT", "5"))
+
     @property
     def AWS_DEFAULT_REGION(self) -> str:
         return os.getenv("AWS_DEFAULT_REGION", "us-east-1")
 
+    @property
+    def AWS_CLIENT_MAX_POOL_CONNECTIONS(self) -> int:
+        return int(os.getenv("AWS_CLIENT_MAX_POOL_CONNECTIONS", "10"))
+
+    @property
+    def AWS_CLIENT_TCP_KEEPALIVE(self) -> bool:
+        return os.getenv("AWS_CLIENT_TCP_KEEPALIVE", "true").lower() == "true"
+
+    @property
+    def COMPLETED_TASK_LOGS_CACHE_SIZE(self) -> int:
+        return int(os.getenv("COMPLETED_TASK_LOGS_CACHE_SIZE", "16"))
+
+    @property
+    def COMPRESSION_MIN_SIZE(self) -> int:
+        return int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    @property
+    def ECS_TASK_DEFINITION_CACHE_TTL(self) -> float:
+        return float(os.getenv("ECS_TASK_DEFINITION_CACHE_TTL", "300"))
+
     @property
     def LOGIN_DISABLED(self) -> bool:
         if login_disabled := os.getenv("LOGIN_DISABLED"):  # noqa: SIM102
@@ -54,6 +106,46 @@ class Config:
                 return True
         return False
 
+    @property
+    def METRICS_NAMESPACE(self) -> str:
+        return os.getenv("METRICS_NAMESPACE", "SAPInvoicesUI")
+
+    @property
+    def OIDC_CLAIMS_CACHE_SIZE(self) -> int:
+        return int(os.getenv("OIDC_CLAIMS_CACHE_SIZE", "256"))
+
+    @property
+    def RUN_HISTORY_PAGE_SIZE(self) -> int:
+        return int(os.getenv("RUN_HISTORY_PAGE_SIZE", "25"))
+
+    @property
+    def RUN_HISTORY_SQLITE_PATH(self) -> str:
+        return os.getenv("RUN_HISTORY_SQLITE_PATH", "run_history.sqlite3")
+
+    @property
+    def RUN_HISTORY_S3_PREFIX(self) -> str:
+        return os.getenv("RUN_HISTORY_S3_PREFIX", "run-history/")
+
+    @property
+    def RUN_INDEX_CACHE_TTL(self) -> float:
+        return float(os.getenv("RUN_INDEX_CACHE_TTL", "60"))
+
+    @property
+    def SPECULATIVE_LOG_FETCH(self) -> bool:
+        return os.getenv("SPECULATIVE_LOG_FETCH", "false").lower() == "true"
+
+    @property
+    def SSE_MAX_STREAM_DURATION(self) -> float:
+        return float(os.getenv("SSE_MAX_STREAM_DURATION", "25"))
+
+    @property
+    def SSE_POLL_INTERVAL(self) -> float:
+        return float(os.getenv("SSE_POLL_INTERVAL", "5"))
+
+    @property
+    def TASK_RESULT_CACHE_SIZE(self) -> int:
+        return int(os.getenv("TASK_RESULT_CACHE_SIZE", "256"))
+
     def check_required_env_vars(self) -> None:
         """Method to raise exception if required env vars not set."""
         missing_vars = [var for var in self.REQUIRED_ENV_VARS if not os.getenv(var)]
@@ -62,6 +154,89 @@ class Config:
             raise OSError(message)
 
 
+@frozen
+class ConfigSnapshot:
+    """Frozen snapshot of the configuration, parsed and validated once.
+
+    Config reads (and parses) environment variables on every attribute access. The
+    snapshot holds the parsed values of every configuration variable instead, so
+    reading configuration on hot paths (e.g., creating an ECS client on every
+    request) is a plain attribute load. As the snapshot is validated when it is
+    created, a misconfigured container fails once at startup rather than on every
+    request that happens to read the offending variable.
+
+    The snapshot of the process is retrieved with get_config_snapshot; clients
+    accept a snapshot to allow injecting a different configuration.
+    """
+
+    ALMA_SAP_INVOICES_CLOUDWATCH_LOG_GROUP: str
+    ALMA_SAP_INVOICES_ECR_IMAGE_NAME: str
+    ALMA_SAP_INVOICES_ECS_CLUSTER: str
+    ALMA_SAP_INVOICES_ECS_NETWORK_CONFIG: dict
+    ALMA_SAP_INVOICES_ECS_TASK_DEFINITION: str
+    LOGIN_DISABLED: bool
+    SECRET_KEY: str
+    SENTRY_DSN: str
+    WORKSPACE: str
+    ALB_PUBLIC_KEY_CACHE_TTL: float
+    ALB_PUBLIC_KEY_FETCH_TIMEOUT: float
+    AWS_DEFAULT_REGION: str
+    AWS_CLIENT_MAX_POOL_CONNECTIONS: int
+    AWS_CLIENT_TCP_KEEPALIVE: bool
+    COMPLETED_TASK_LOGS_CACHE_SIZE: int
+    COMPRESSION_MIN_SIZE: int
+    ECS_TASK_DEFINITION_CACHE_TTL: float
+    METRICS_NAMESPACE: str
+    OIDC_CLAIMS_CACHE_SIZE: int
+    RUN_HISTORY_PAGE_SIZE: int
+    RUN_HISTORY_STORE: str | None = field(validator=in_((None, "sqlite", "s3")))
+    RUN_HISTORY_SQLITE_PATH: str
+    RUN_HISTORY_S3_BUCKET: str | None = field()
+    RUN_HISTORY_S3_PREFIX: str
+    RUN_INDEX_CACHE_TTL: float
+    SPECULATIVE_LOG_FETCH: bool
+    SSE_MAX_STREAM_DURATION: float
+    SSE_POLL_INTERVAL: float
+    TASK_RESULT_CACHE_SIZE: int
+    TEMPLATE_BYTECODE_CACHE_DIR: str | None
+
+    @RUN_HISTORY_S3_BUCKET.validator
+    def _check_run_history_s3_bucket(self, _: Any, value: str | None) -> None:
+        if self.RUN_HISTORY_STORE == "s3" and not value:
+            message = "RUN_HISTORY_S3_BUCKET is required when RUN_HISTORY_STORE=s3"
+            raise ValueError(message)
+
+    @classmethod
+    def from_config(cls, config: Config | None = None) -> "ConfigSnapshot":
+        """Create a snapshot of the configuration.
+
+        Raises:
+            OSError: If any required environment variable is not set.
+            ValueError: If any environment variable has an invalid value.
+        """
+        config = config or Config()
+        config.check_required_env_vars()
+        values = {}
+        for attribute in fields(cls):
+            try:
+                values[attribute.name] = getattr(config, attribute.name)
+            except ValueError as error:
+                message = f"Invalid value for {attribute.name}: {error}"
+                raise ValueError(message) from error
+        return cls(**values)
+
+
+@cache
+def get_config_snapshot() -> ConfigSnapshot:
+    """Get the configuration snapshot of the process.
+
+    The snapshot is created on first use (at startup in the Lambda handler), after
+    which environment variable changes are not picked up. If the configuration is
+    invalid, nothing is cached and the error is raised again on the next call.
+    """
+    return ConfigSnapshot.from_config()
+
+
 def configure_logger(*, verbose: bool) -> str:
     logger = logging.getLogger()
     if verbose:
@@ -89,6 +264,9 @@ def configure_sentry() -> str:
     env = os.getenv("WORKSPACE")
     sentry_dsn = os.getenv("SENTRY_DSN")
     if sentry_dsn and sentry_dsn.lower() != "none":
+        # imported here to keep 'sentry_sdk' out of the cold start when disabled
+        import sentry_sdk  # noqa: PLC0415
+
         sentry_sdk.init(
             sentry_dsn,
             environment=env,
@@ -0,0 +1,185 @@
+import contextvars
+import json
+import sys
+import time
+from typing import Any
+
+from attrs import define, field
+
+from webapp.config import get_config_snapshot
+from webapp.utils.cache import get_cache_stats
+from webapp.utils.instrumentation import AWSCall, summarize_aws_calls
+
+# maximum number of values of a metric in a single EMF document
+EMF_MAX_VALUES = 100
+
+_invocation: contextvars.ContextVar["InvocationMetrics | None"] = contextvars.ContextVar(
+    "invocation_metrics", default=None
+)
+
+
+@define
+class RequestMetrics:
+    """Metrics of a request handled by the Flask app."""
+
+    route: str
+    status: int
+    duration: float
+    aws_calls: list[AWSCall]
+
+
+@define
+class InvocationMetrics:
+    """Metrics collected during a Lambda invocation.
+
+    The stats of the named caches (see get_cache_stats) are taken when the
+    invocation starts, so that hit ratios are reported for the lookups made
+    during the invocation rather than since the container started.
+    """
+
+    cold_start: bool
+    cache_stats: dict[str, dict[str, int | float]] = field(factory=get_cache_stats)
+    requests: list[RequestMetrics] = field(factory=list)
+
+
+def start_invocation(*, cold_start: bool) -> InvocationMetrics:
+    """Start collecting the metrics of a Lambda invocation.
+
+    Until flush_metrics is called, requests recorded in the current context (see
+    record_request) are added to the metrics of the invocation. Outside of an
+    invocation (e.g., when the app runs locally), nothing is collected.
+
+    Args:
+        cold_start (bool): Whether the invocation is the first of the container.
+    """
+    invocation = InvocationMetrics(cold_start=cold_start)
+    _invocation.set(invocation)
+    return invocation
+
+
+def record_request(
+    route: str, status: int, duration: float, aws_calls: list[AWSCall]
+) -> None:
+    """Add the metrics of a request to the metrics of the current invocation.
+
+    Args:
+        route (str): URL rule of the route (e.g., '/process-invoices/status/<task_id>'),
+            rather than the path, to keep the number of metric dimensions low.
+        status (int): Status code of the response.
+        duration (float): Duration (in seconds) of the request.
+        aws_calls (list[AWSCall]): AWS calls made while handling the request.
+    """
+    if (invocation := _invocation.get()) is not None:
+        invocation.requests.append(RequestMetrics(route, status, duration, aws_calls))
+
+
+def flush_metrics() -> list[dict[str, Any]]:
+    """Write the metrics of the current invocation and stop collecting them.
+
+    Metrics are written to stdout in the CloudWatch embedded metric format (EMF),
+    from which the Lambda log group extracts them: a single JSON document per
+    route (typically one per invocation) with the values of every metric, rather
+    than a log line per data point.
+
+    Returns:
+        list[dict[str, Any]]: Written EMF documents.
+    """
+    invocation = _invocation.get()
+    _invocation.set(None)
+    if invocation is None or not invocation.requests:
+        return []
+
+    documents = format_emf_documents(
+        invocation,
+        namespace=get_config_snapshot().METRICS_NAMESPACE,
+        cache_stats=get_cache_stats(),
+    )
+    for document in documents:
+        sys.stdout.write(json.dumps(document, separators=(",", ":")) + "\n")
+    sys.stdout.flush()
+    return documents
+
+
+def format_emf_documents(
+    invocation: InvocationMetrics,
+    namespace: str,
+    cache_stats: dict[str, dict[str, int | float]],
+) -> list[dict[str, Any]]:
+    """Format the metrics of an invocation as EMF documents, one per route.
+
+    Each document has the dimension 'Route' and the metrics:
+        - Latency: Duration of each request (Milliseconds).
+        - ColdStart: 1 for the first invocation of a container, 0 otherwise (Count).
+        - AWSCalls and AWSLatency: Number of AWS calls of each request (Count) and
+          their total duration (Milliseconds).
+        - <service>.<operation>.Calls and <service>.<operation>.Latency: Number of
+          calls of each AWS operation (Count) and their total duration
+          (Milliseconds) for each request that called it.
+        - <cache>.HitRatio: Hit ratio of each named cache with lookups during the
+          invocation (Percent).
+
+    Args:
+        invocation (InvocationMetrics): Metrics of the invocation.
+        namespace (str): CloudWatch namespace of the metrics.
+        cache_stats (dict[str, dict[str, int | float]]): Stats of the named caches
+            at the end of the invocation.
+    """
+    values_by_route: dict[str, dict[str, list[float]]] = {}
+    for request in invocation.requests:
+        values = values_by_route.setdefault(request.route, {})
+        values.setdefault("Latency", []).append(round(request.duration * 1000, 1))
+        values.setdefault("AWSCalls", []).append(len(request.aws_calls))
+        values.setdefault("AWSLatency", []).append(
+            round(sum(call.duration for call in request.aws_calls) * 1000, 1)
+        )
+        for name, (count, duration) in summarize_aws_calls(request.aws_calls).items():
+            values.setdefault(f"{name}.Calls", []).append(count)
+            values.setdefault(f"{name}.Latency", []).append(round(duration * 1000, 1))
+
+    cache_hit_ratios = {}
+    for name, stats in cache_stats.items():
+        start = invocation.cache_stats.get(name, {"hits": 0, "misses": 0})
+        hits = stats["hits"] - start["hits"]
+        lookups = hits + stats["misses"] - start["misses"]
+        # counters are reset when a cache is cleared or replaced
+        if lookups > 0 and hits >= 0:
+            cache_hit_ratios[f"{name}.HitRatio"] = round(hits / lookups * 100, 1)
+
+    documents = []
+    for route, values in values_by_route.items():
+        metrics = {
+            "ColdStart": int(invocation.cold_start),
+            **{
+                name: metric_values[:EMF_MAX_VALUES]
+                for name, metric_values in values.items()
+            },
+            **cache_hit_ratios,
+        }
+        documents.append(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": namespace,
+                            "Dimensions": [["Route"]],
+                            "Metrics": [
+                                {"Name": name, "Unit": _get_unit(name)}
+                                for name in metrics
+                            ],
+                        }
+                    ],
+                },
+                "Route": route,
+                **metrics,
+            }
+        )
+    return documents
+
+
+def _get_unit(metric_name: str) -> str:
+    if metric_name.endswith("Latency"):
+        return "Milliseconds"
+    if metric_name.endswith("HitRatio"):
+        return "Percent"
+    return "Count"
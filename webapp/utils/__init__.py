@@ -1,20 +1,251 @@
 import base64
+import functools
+import hashlib
 import json
 import logging
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
 from typing import Any
 
-import jwt
-import requests
 from flask_login import current_user
 
-from webapp.config import Config
-from webapp.exceptions import ECSTaskDoesNotExistError
+from webapp.config import get_config_snapshot
+from webapp.exceptions import (
+    ECSTaskDoesNotExistError,
+    ECSTaskLogStreamDoesNotExistError,
+)
 from webapp.utils.aws import CloudWatchLogsClient, ECSClient
+from webapp.utils.cache import TTLCache
+from webapp.utils.history import get_run_history_store
+from webapp.utils.instrumentation import ContextThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_TASK_STATUSES = ("COMPLETED", "EXPIRED (UNKNOWN)")
 
-def get_task_status_and_logs(task_id: str) -> tuple[str, list]:
+# ID of server-sent events sent before any log event was read (i.e., no cursor)
+EMPTY_CURSOR_EVENT_ID = "-"
+
+
+@functools.cache
+def get_task_result_cache() -> TTLCache[tuple[str, list[str]]]:
+    """Get the cache of results (status and logs) for completed task runs.
+
+    Once a task run is "COMPLETED", neither its status nor the summary of its logs
+    will change, so the result is cached by task ID for the lifetime of the
+    process (i.e., a warm Lambda container). The least recently used results
+    are evicted once the cache holds TASK_RESULT_CACHE_SIZE results.
+    """
+    return TTLCache(
+        maxsize=get_config_snapshot().TASK_RESULT_CACHE_SIZE, name="task_results"
+    )
+
+
+@functools.cache
+def get_completed_task_logs_cache() -> TTLCache[tuple[list[str], str | None]]:
+    """Get the cache of log messages of completed task runs.
+
+    The log messages of a "COMPLETED" task run are read in full (from the start of
+    its log stream) when its logs are tailed from the start, e.g., when its status
+    page is reloaded (see get_task_status_and_new_logs). All log messages and the
+    final cursor are cached by task ID, so that tailing them again makes no
+    requests to ECS or CloudWatch. Each entry holds a whole log stream, so the
+    least recently used entries are evicted once the cache holds the (small)
+    COMPLETED_TASK_LOGS_CACHE_SIZE entries. Runs without log messages are not
+    cached, as their logs may not have reached CloudWatch yet.
+    """
+    return TTLCache(
+        maxsize=get_config_snapshot().COMPLETED_TASK_LOGS_CACHE_SIZE,
+        name="completed_task_logs",
+    )
+
+
+@functools.cache
+def get_oidc_claims_cache() -> TTLCache[dict[str, Any]]:
+    """Get the cache of verified OIDC user claims.
+
+    Verifying the signature of the user claims JWT (see parse_oidc_data) is the
+    most expensive step of a login, and requests from several browser tabs (or
+    sessions) of the same user carry the same access token. Verified claims are
+    therefore cached by the fingerprint of the access token (the token itself is
+    not kept, see get_access_token_fingerprint) until the claims expire. The least
+    recently used claims are evicted once the cache holds
+    OIDC_CLAIMS_CACHE_SIZE entries.
+    """
+    return TTLCache(
+        maxsize=get_config_snapshot().OIDC_CLAIMS_CACHE_SIZE, name="oidc_claims"
+    )
+
+
+def get_completed_task_result(task_id: str) -> tuple[str, list[str]] | None:
+    """Get the cached result (status and logs) of a task run known to be completed.
+
+    Returns None if the result of the task run is not in the task result cache.
+    """
+    return get_task_result_cache().get(task_id)
+
+
+def get_recorded_task_result(task_id: str) -> tuple[str, list[str]] | None:
+    """Get the result (status and logs) of a completed task run from run history.
+
+    The result is looked up in the run history store (if configured) and added to
+    the task result cache. Returns None if the task run is not recorded as
+    completed.
+
+    Reading is best-effort: the result can still be looked up in AWS, so an error
+    from the store is logged and None is returned.
+    """
+    if not (run_history_store := get_run_history_store()):
+        return None
+    try:
+        record = run_history_store.get(task_id)
+    except Exception:
+        logger.exception(f"Failed to read run history of task run '{task_id}'.")
+        return None
+    if record and record.status == "COMPLETED":
+        result = (record.status, record.summary or [])
+        get_task_result_cache().set(task_id, result)
+        return result
+    return None
+
+
+def set_completed_task_result(
+    task_id: str, logs: list[str], stopped_at: datetime | None = None
+) -> None:
+    """Save the result of a completed task run to the cache and run history store.
+
+    The 'stopped_at' is the time the ECS task stopped, if known.
+
+    Recording is best-effort: the result is already cached, so an error from the
+    store is logged rather than raised.
+    """
+    get_task_result_cache().set(task_id, ("COMPLETED", logs))
+    if run_history_store := get_run_history_store():
+        try:
+            run_history_store.record_completion(
+                task_id, "COMPLETED", logs, stopped_at=stopped_at
+            )
+        except Exception:
+            logger.exception(f"Failed to record completion of task run '{task_id}'.")
+
+
+def record_run_launch(task_id: str, run_type: str) -> None:
+    """Record a launched run in the run history store (if configured).
+
+    Recording is best-effort: the task is already running, so an error from the
+    store is logged rather than raised.
+    """
+    if run_history_store := get_run_history_store():
+        user = current_user.name if current_user.is_authenticated else None
+        try:
+            run_history_store.record_launch(task_id, run_type, user)
+        except Exception:
+            logger.exception(f"Failed to record launch of task run '{task_id}'.")
+
+
+@functools.cache
+def get_run_history_page_cache() -> TTLCache[tuple[list[dict], str | None]]:
+    """Get the cache of pages of the run history (see get_run_history_page).
+
+    Pages are cached by cursor and page size for RUN_INDEX_CACHE_TTL seconds, so
+    reloading a page of the run history makes no requests to CloudWatch.
+    """
+    return TTLCache(
+        maxsize=32,
+        ttl=get_config_snapshot().RUN_INDEX_CACHE_TTL,
+        name="run_history_pages",
+    )
+
+
+def get_run_history_page(
+    cursor: str | None = None, page_size: int | None = None
+) -> tuple[list[dict], str | None]:
+    """Get a page of the run history, newest first.
+
+    Each task run has a CloudWatch log stream named after its task ID, so the run
+    history is listed from the log streams of the log group, ordered by last
+    event time (see CloudWatchLogsClient.list_log_streams). Only the log streams
+    needed to fill the page are requested; the cursor holds the position in the
+    listing of log streams where the next page starts.
+
+    Args:
+        cursor (str | None, optional): Cursor returned with the previous page.
+            Defaults to None (i.e., the first page).
+        page_size (int | None, optional): Number of runs per page. Defaults to
+            RUN_HISTORY_PAGE_SIZE of the configuration snapshot.
+
+    Returns:
+        tuple[list[dict], str | None]: Task runs and the cursor for the next page.
+            The cursor is None on the last page. Timestamps of task runs are
+            ISO 8601 strings in UTC; 'last_event_at' is None if nothing was
+            logged.
+
+    Raises:
+        ValueError: If the cursor is invalid or has expired.
+    """
+    page_size = page_size or get_config_snapshot().RUN_HISTORY_PAGE_SIZE
+    run_history_page_cache = get_run_history_page_cache()
+    if (page := run_history_page_cache.get((cursor, page_size))) is not None:
+        return page
+
+    cloudwatchlogs_client = CloudWatchLogsClient()
+    try:
+        next_token, offset = _decode_run_history_cursor(cursor) if cursor else (None, 0)
+        log_streams, position = cloudwatchlogs_client.list_log_streams(
+            page_size, next_token, offset
+        )
+    except ValueError:
+        message = f"Invalid run history cursor: '{cursor}'"
+        raise ValueError(message) from None
+
+    runs = [
+        {
+            "task_id": log_stream["logStreamName"].removeprefix(
+                cloudwatchlogs_client.log_stream_name_prefix
+            ),
+            "started_at": _format_timestamp(log_stream.get("creationTime")),
+            "last_event_at": _format_timestamp(log_stream.get("lastEventTimestamp")),
+        }
+        for log_stream in log_streams
+    ]
+    page = (runs, _encode_run_history_cursor(*position) if position else None)
+    run_history_page_cache.set((cursor, page_size), page)
+    return page
+
+
+def _encode_run_history_cursor(next_token: str | None, offset: int) -> str:
+    """Encode a position in the listing of log streams as a URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps([next_token, offset]).encode()).decode()
+
+
+def _decode_run_history_cursor(cursor: str) -> tuple[str | None, int]:
+    """Decode a cursor created by _encode_run_history_cursor.
+
+    Raises:
+        ValueError: If the cursor is not a valid cursor.
+    """
+    try:
+        next_token, offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        raise ValueError(cursor) from None
+    if not (
+        isinstance(next_token, str | None) and isinstance(offset, int) and offset >= 0
+    ):
+        raise ValueError(cursor)
+    return next_token, offset
+
+
+def _format_timestamp(timestamp: int | None) -> str | None:
+    """Format a CloudWatch timestamp (milliseconds since epoch) as ISO 8601."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp / 1000, tz=UTC).isoformat()
+
+
+def get_task_status_and_logs(
+    task_id: str, *, speculative: bool | None = None
+) -> tuple[str, list]:
     """Utility method for retrieving task status and logs using AWS clients.
 
     The method relies on instances of ECSClient and CloudWatchLogsClient.
@@ -30,11 +261,13 @@ def get_task_status_and_logs(task_id: str) -> tuple[str, list]:
     The flow of logic is as follows:
 
     1. Get the status of a task.
-       - If the ECS task exists, the status for the task is retrieved.
+       - If the ECS task exists, the status (and stop time) for the task is
+         retrieved.
          When task_status = "STOPPED" the ECS task is considered "COMPLETED"
          (the task run completed).
        - If the ECS task does not exist, set task_status = "UNKNOWN" and
-         proceed.
+         proceed. If the task run is recorded as completed in the run history
+         store (see get_recorded_task_result), its recorded result is returned.
 
     2. Get the logs for the task.
        - The log message defaults to "Loading." Requests to CloudWatch are only
@@ -48,37 +281,241 @@ def get_task_status_and_logs(task_id: str) -> tuple[str, list]:
          are retrieved only when the task run completed.
        - If the log stream does not exist, CloudWatchLogsClient.get_log_messages
          raises ECSTaskLogStreamDoesNotExistError.
+
+    Results for "COMPLETED" task runs are cached (see get_task_result_cache) and
+    recorded in the run history store (see get_run_history_store), so repeated
+    lookups of a completed task run make no requests to ECS or CloudWatch. The
+    run history store is only read once ECS no longer knows the task, so polling
+    an active task run makes no requests to the store.
+
+    If 'speculative' is True (defaults to SPECULATIVE_LOG_FETCH of the
+    configuration snapshot), the last page of logs is retrieved from CloudWatch in
+    a separate thread while the status is retrieved from ECS (see
+    CloudWatchLogsClient.get_log_summary_from_last_page). If the task completed
+    and its summary starts in that page, no further requests to CloudWatch are
+    made; otherwise, the logs are retrieved as usual. The speculative lookup is a
+    single request: it is cancelled if it has not started, or waited for
+    otherwise, so no request outlives the call.
     """
+    if (result := get_completed_task_result(task_id)) is not None:
+        return result
+
+    if speculative is None:
+        speculative = get_config_snapshot().SPECULATIVE_LOG_FETCH
+
     ecs_client = ECSClient()
     cloudwatchlogs_client = CloudWatchLogsClient()
-    # If task exists, get the current status
+    executor = ContextThreadPoolExecutor(max_workers=1) if speculative else None
     try:
-        task_status = (
-            "COMPLETED"
-            if (status := ecs_client.get_task_status(task_id)) == "STOPPED"
-            else status
+        get_log_messages: Callable[[], list] = functools.partial(
+            cloudwatchlogs_client.get_log_messages, task_id
         )
-    except ECSTaskDoesNotExistError:
-        task_status = "UNKNOWN"
+        if executor:
+            last_page_summary = executor.submit(
+                cloudwatchlogs_client.get_log_summary_from_last_page, task_id
+            )
+
+            def get_log_messages() -> list:
+                if (summary := last_page_summary.result()) is not None:
+                    return summary
+                return cloudwatchlogs_client.get_log_messages(task_id)
 
-    # Default log message
-    logs = ["Loading."]
+        # If task exists, get the current status
+        stopped_at = None
+        if task := ecs_client.describe_task(task_id):
+            task_status = (
+                "COMPLETED" if (status := task["lastStatus"]) == "STOPPED" else status
+            )
+            stopped_at = task.get("stoppedAt")
+        else:
+            task_status = "UNKNOWN"
+
+        # Default log message
+        logs = ["Loading."]
+
+        # ECS tasks with "UNKNOWN" status are old ECS task runs
+        # If logs exist, set status as "COMPLETED" and return log messages
+        # If logs do not exist, set status as "EXPIRED (UNKNOWN)" and
+        #   return message saying log stream has expired.
+        if task_status == "UNKNOWN":
+            if (result := get_recorded_task_result(task_id)) is not None:
+                return result
+            logs = get_log_messages()
+            if logs:
+                set_completed_task_result(task_id, logs)
+                return "COMPLETED", logs
+            return "EXPIRED (UNKNOWN)", ["Log stream expired, cannot find logs for task."]
+
+        # ECS tasks with "COMPLETED" status are recent ECS task runs
+        if task_status == "COMPLETED":
+            logs = get_log_messages()
+            set_completed_task_result(task_id, logs, stopped_at)
+
+        return task_status, logs
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def get_task_status_and_new_logs(
+    task_id: str, cursor: str | None = None
+) -> tuple[str, list[str], str | None]:
+    """Utility method for retrieving task status and new log messages.
+
+    This is the incremental counterpart to get_task_status_and_logs: instead of
+    returning a summary of the logs once the task has completed, it returns the
+    log messages written to the task's log stream since the provided cursor
+    (see CloudWatchLogsClient.get_new_log_events), so that the logs of a task run
+    can be tailed while it runs. The task status follows the same rules as
+    get_task_status_and_logs:
+
+    * If the ECS task exists, "STOPPED" is reported as "COMPLETED".
+    * If the ECS task does not exist but its log stream does, the task is an old
+      task run and is reported as "COMPLETED".
+    * If neither the ECS task nor its log stream exist, the task is reported as
+      "EXPIRED (UNKNOWN)".
+    * If the ECS task exists but its log stream has not been created yet (e.g.,
+      the task is still provisioning), no log messages are returned and the
+      cursor is unchanged.
+
+    The new log messages are retrieved from CloudWatch in a separate thread while
+    the status is retrieved from ECS, so a call takes as long as the slower of
+    the two rather than their sum. If the task run is known to be "COMPLETED"
+    (see get_completed_task_result), the ECS task status is not requested.
+
+    Once the log messages of a "COMPLETED" task run were read from the start, they
+    are cached with the final cursor (see get_completed_task_logs_cache): reading
+    them from the start or from the final cursor again makes no requests to ECS
+    or CloudWatch.
+
+    Returns:
+        tuple[str, list[str], str | None]: Task status, new log messages, and the
+            cursor to pass on the next call.
+    """
+    completed_task_logs_cache = get_completed_task_logs_cache()
+    if (completed_task_logs := completed_task_logs_cache.get(task_id)) is not None:
+        messages, final_cursor = completed_task_logs
+        if cursor is None:
+            return "COMPLETED", list(messages), final_cursor
+        if cursor == final_cursor:
+            return "COMPLETED", [], final_cursor
+
+    ecs_client = ECSClient()
+    cloudwatchlogs_client = CloudWatchLogsClient()
+    executor = ContextThreadPoolExecutor(max_workers=1)
+    try:
+        # the new logs are retrieved in a separate thread while the status is
+        # retrieved from ECS, as both are needed whatever the status
+        new_log_events = executor.submit(
+            cloudwatchlogs_client.get_new_log_events, task_id, cursor
+        )
+        if (result := get_completed_task_result(task_id)) is not None:
+            task_status, _ = result
+        else:
+            try:
+                task_status = (
+                    "COMPLETED"
+                    if (status := ecs_client.get_task_status(task_id)) == "STOPPED"
+                    else status
+                )
+            except ECSTaskDoesNotExistError:
+                task_status = "UNKNOWN"
+        log_events, next_cursor = new_log_events.result()
+    except ECSTaskLogStreamDoesNotExistError:
+        if task_status == "UNKNOWN":
+            return (
+                "EXPIRED (UNKNOWN)",
+                ["Log stream expired, cannot find logs for task."],
+                cursor,
+            )
+        return task_status, [], cursor
+    finally:
+        # do not wait for the logs if retrieving the status failed
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    # ECS tasks with "UNKNOWN" status are old ECS task runs
-    # If logs exist, set status as "COMPLETED" and return log messages
-    # If logs do not exist, set status as "EXPIRED (UNKNOWN)" and
-    #   return message saying log stream has expired.
     if task_status == "UNKNOWN":
-        logs = cloudwatchlogs_client.get_log_messages(task_id)
+        task_status = "COMPLETED"
+    messages = [event["message"] for event in log_events]
+    if task_status == "COMPLETED" and cursor is None and messages:
+        completed_task_logs_cache.set(task_id, (messages, next_cursor))
+        messages = list(messages)
+    return task_status, messages, next_cursor
+
+
+def stream_task_status_and_logs(
+    task_id: str,
+    cursor: str | None = None,
+    *,
+    poll_interval: float = 5,
+    max_duration: float = 25,
+    buffered: bool = False,
+) -> Iterator[str]:
+    """Generate server-sent events (SSE) with task status transitions and new logs.
+
+    The task is polled every 'poll_interval' seconds using
+    get_task_status_and_new_logs. The following events are generated:
+
+    * "status": Sent when the task status changes (including the first poll).
+    * "logs": Sent with a JSON array of new log messages.
+    * "end": Sent once the task reaches a terminal status, after which the
+      stream closes and the client should not reconnect.
+
+    Events carry the log cursor as their ID, so a client that reconnects (i.e.,
+    with the 'Last-Event-ID' header) resumes tailing the logs where it left off.
+    Until a log event is read, events carry EMPTY_CURSOR_EVENT_ID instead, which
+    resumes from the start of the logs. The first event sets the reconnection
+    delay of the client ('retry') to 'poll_interval'. The stream closes after
+    'max_duration' seconds, at which point the client is expected to reconnect.
+
+    When the response is buffered rather than streamed (e.g., a Lambda Function
+    URL via apig-wsgi), set 'buffered=True': a new connection (no cursor) then
+    closes right after the first poll so the page renders immediately, while
+    reconnections hold the connection open for up to 'max_duration' seconds and
+    deliver the events in one batch.
+    """
+    deadline = time.monotonic() + max_duration
+    stop_after_first_poll = buffered and cursor is None
+    if cursor == EMPTY_CURSOR_EVENT_ID:
+        cursor = None
+    retry: int | None = int(poll_interval * 1000)
+    last_status = None
+    while True:
+        task_status, logs, cursor = get_task_status_and_new_logs(task_id, cursor)
+        event_id = cursor or EMPTY_CURSOR_EVENT_ID
+        if task_status != last_status:
+            yield format_server_sent_event(
+                task_status, event="status", event_id=event_id, retry=retry
+            )
+            last_status = task_status
+            retry = None
         if logs:
-            return "COMPLETED", logs
-        return "EXPIRED (UNKNOWN)", ["Log stream expired, cannot find logs for task."]
+            yield format_server_sent_event(logs, event="logs", event_id=event_id)
+        if task_status in TERMINAL_TASK_STATUSES:
+            yield format_server_sent_event(task_status, event="end", event_id=event_id)
+            return
+        if stop_after_first_poll or time.monotonic() + poll_interval > deadline:
+            return
+        time.sleep(poll_interval)
+
 
-    # ECS tasks with "COMPLETED" status are recent ECS task runs
-    if task_status == "COMPLETED":
-        logs = cloudwatchlogs_client.get_log_messages(task_id)
+def format_server_sent_event(
+    data: Any,  # noqa: ANN401
+    event: str | None = None,
+    event_id: str | None = None,
+    retry: int | None = None,
+) -> str:
+    """Format a server-sent event with JSON-encoded data.
 
-    return task_status, logs
+    'retry' sets the delay (in milliseconds) before the client reconnects.
+    """
+    message = ""
+    if event_id:
+        message += f"id: {event_id}\n"
+    if event:
+        message += f"event: {event}\n"
+    if retry is not None:
+        message += f"retry: {retry}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
 
 
 def log_activity(message: str) -> None:
@@ -87,11 +524,23 @@ def log_activity(message: str) -> None:
         logger.info(f"{current_user.name} {message}")
 
 
+def get_access_token_fingerprint(access_token: str) -> str:
+    """Get a short fingerprint identifying an OIDC access token.
+
+    The fingerprint is the first 16 bytes of the SHA-256 hash of the access token,
+    URL-safe base64 encoded (22 characters), so access tokens (about 1KB) can be
+    compared and used as keys without keeping them.
+    """
+    digest = hashlib.sha256(access_token.encode()).digest()[:16]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
 def parse_oidc_data(
     encoded_jwt: str,
     options: dict[str, Any] | None = None,
     *,
     verify: bool = True,
+    access_token: str | None = None,
 ) -> Any:  # noqa: ANN401
     """Retrieve parsed OIDC data and access token from request headers.
 
@@ -102,9 +551,29 @@ def parse_oidc_data(
     in JSON web tokens (JWT) format. This method will parse OIDC data
     from the encoded user claims JWT.
 
+    The public key used to verify the JWT signature is retrieved from the
+    regional ALB endpoint and cached by key ID (see PublicKeyCache).
+
     For more details, see:
     https://docs.aws.amazon.com/elasticloadbalancing/latest/application/listener-authenticate-users.html
+
+    'jwt' (with 'cryptography') and 'requests' are imported on the first login
+    rather than when the app is loaded, to keep them out of the cold start.
+
+    If the 'access_token' sent with the user claims is given, the verified claims
+    are cached for the access token until they expire ('exp'), and claims cached
+    for the access token are returned without verifying the JWT again (see
+    get_oidc_claims_cache).
     """
+    if access_token is not None:
+        cache_key = get_access_token_fingerprint(access_token)
+        if (claims := get_oidc_claims_cache().get(cache_key)) is not None:
+            return dict(claims)
+
+    import jwt  # noqa: PLC0415
+
+    from webapp.utils.public_keys import get_public_key_cache  # noqa: PLC0415
+
     # parse JWT headers
     jwt_headers_str = encoded_jwt.split(".")[0]
     decoded_jwt_headers_json = base64.b64decode(jwt_headers_str).decode()
@@ -113,20 +582,19 @@ def parse_oidc_data(
     # get the key id from headers
     key_id = jwt_headers["kid"]
 
-    # get the public key from regional endpoint
-    url = (
-        "https://public-keys.auth.elb."
-        + Config().AWS_DEFAULT_REGION
-        + ".amazonaws.com/"
-        + key_id
-    )
-    pub_key = requests.get(url, timeout=60).text
+    # get the public key from cache or regional endpoint
+    pub_key = get_public_key_cache().get(key_id)
 
     # decode payload
-    return jwt.decode(
+    claims = jwt.decode(
         encoded_jwt,
         pub_key,
         algorithms=["ES256"],
         verify=verify,
         options=options,
     )
+
+    # cache claims until they expire; claims without an expiry are not cached
+    if access_token is not None and (ttl := claims.get("exp", 0) - time.time()) > 0:
+        get_oidc_claims_cache().set(cache_key, dict(claims), ttl=ttl)
+    return claims
@@ -1,4 +1,13 @@
+from webapp.utils.aws.clients import clear_clients, get_client
 from webapp.utils.aws.cloudwatch import CloudWatchLogsClient
-from webapp.utils.aws.ecs import ECSClient
+from webapp.utils.aws.ecs import ECSClient, get_task_definition_cache
+from webapp.utils.aws.monitor import TaskMonitor
 
-__all__ = ["CloudWatchLogsClient", "ECSClient"]
+__all__ = [
+    "CloudWatchLogsClient",
+    "ECSClient",
+    "TaskMonitor",
+    "clear_clients",
+    "get_client",
+    "get_task_definition_cache",
+]
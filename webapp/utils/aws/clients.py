@@ -0,0 +1,104 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Literal, overload
+
+if TYPE_CHECKING:
+    from mypy_boto3_ecs.client import ECSClient as ECSClientType
+    from mypy_boto3_logs.client import CloudWatchLogsClient as CloudWatchLogsClientType
+
+from webapp.config import get_config_snapshot
+from webapp.utils.instrumentation import register_aws_call_hooks
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[tuple[str, str, str | None], Any] = {}
+_clients_lock = threading.Lock()
+
+
+@overload
+def get_client(
+    service_name: Literal["ecs"],
+    *,
+    region_name: str | None = None,
+    endpoint_url: str | None = None,
+) -> "ECSClientType": ...
+
+
+@overload
+def get_client(
+    service_name: Literal["logs"],
+    *,
+    region_name: str | None = None,
+    endpoint_url: str | None = None,
+) -> "CloudWatchLogsClientType": ...
+
+
+@overload
+def get_client(
+    service_name: str,
+    *,
+    region_name: str | None = None,
+    endpoint_url: str | None = None,
+) -> Any: ...  # noqa: ANN401
+
+
+def get_client(
+    service_name: str,
+    *,
+    region_name: str | None = None,
+    endpoint_url: str | None = None,
+) -> Any:
+    """Get a long-lived boto3 client from the process-wide client registry.
+
+    Creating a boto3 client is expensive (loading service models, resolving
+    credentials and endpoints) and every new client opens its own connection
+    pool, paying for a fresh TLS handshake on its first request. Clients are
+    therefore created once per (service, region, endpoint) and reused for the
+    lifetime of the process. boto3 clients are thread-safe, so the same client
+    can be shared across threads; creation itself is guarded by a lock because
+    the default boto3 session is not.
+
+    boto3 and botocore are imported when the first client is created rather than
+    when the app is loaded, as importing them takes a large share of the cold
+    start and not every request needs an AWS client.
+
+    The calls made by the clients are recorded per request for the Server-Timing
+    header and request logs (see register_aws_call_hooks).
+
+    Args:
+        service_name (str): Name of the AWS service (e.g., "ecs", "logs").
+        region_name (str | None, optional): AWS region override. Defaults to
+            the AWS_DEFAULT_REGION of the configuration snapshot.
+        endpoint_url (str | None, optional): Endpoint URL override (e.g., for a
+            local AWS emulator). Defaults to the endpoint resolved by botocore.
+    """
+    config = get_config_snapshot()
+    region_name = region_name or config.AWS_DEFAULT_REGION
+    key = (service_name, region_name, endpoint_url)
+    if (client := _clients.get(key)) is not None:
+        return client
+
+    with _clients_lock:
+        if (client := _clients.get(key)) is None:
+            import boto3  # noqa: PLC0415
+            from botocore.config import Config as BotocoreConfig  # noqa: PLC0415
+
+            logger.debug(f"Creating boto3 client for {key}")
+            client = boto3.client(
+                service_name,  # type: ignore[call-overload]
+                region_name=region_name,
+                endpoint_url=endpoint_url,
+                config=BotocoreConfig(
+                    max_pool_connections=config.AWS_CLIENT_MAX_POOL_CONNECTIONS,
+                    tcp_keepalive=config.AWS_CLIENT_TCP_KEEPALIVE,
+                ),
+            )
+            register_aws_call_hooks(client.meta.events)
+            _clients[key] = client
+    return client
+
+
+def clear_clients() -> None:
+    """Remove all clients from the client registry."""
+    with _clients_lock:
+        _clients.clear()
@@ -1,17 +1,27 @@
 import logging
-from typing import TYPE_CHECKING
+import re
+from collections import deque
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Literal
 
-import boto3
-from attrs import define, field
+from attrs import Factory, define, field
 
 if TYPE_CHECKING:
     from mypy_boto3_logs.client import CloudWatchLogsClient as CloudWatchLogsClientType
+    from mypy_boto3_logs.type_defs import LogStreamTypeDef
 
-from webapp.config import Config
+from webapp.config import ConfigSnapshot, get_config_snapshot
 from webapp.exceptions import ECSTaskLogStreamDoesNotExistError
+from webapp.utils.aws.clients import get_client
 
 logger = logging.getLogger(__name__)
 
+# log messages marking the start of the summary of an SAP invoice processing run
+SUMMARY_MARKERS = (
+    "SAP invoice process completed",
+    "No invoices waiting to be sent in Alma",
+)
+
 
 @define
 class CloudWatchLogsClient:
@@ -23,58 +33,342 @@ class CloudWatchLogsClient:
     log stream name. For this reason, the client only requires
     the log group name and the task ID to get the log stream
     associated with an ECS task.
+
+    The log messages that mark the start of the summary of a run
+    ('summary_markers') are compiled into a single pattern when the
+    client is created. When reading log streams from the tail, pages
+    of 'page_size' log events are retrieved, which is typically enough
+    to find the summary with a single request.
+
+    Unless given, the log group name is read from the configuration snapshot
+    ('config'), which defaults to the snapshot of the process.
     """
 
+    config: ConfigSnapshot = field(factory=get_config_snapshot, kw_only=True)
     log_group_name: str = field(
-        factory=lambda: Config().ALMA_SAP_INVOICES_CLOUDWATCH_LOG_GROUP
+        default=Factory(
+            lambda self: self.config.ALMA_SAP_INVOICES_CLOUDWATCH_LOG_GROUP,
+            takes_self=True,
+        )
     )
     log_stream_name_prefix: str = field(
-        factory=lambda: f"sapinvoices/{Config().ALMA_SAP_INVOICES_CLOUDWATCH_LOG_GROUP}/"
+        default=Factory(
+            lambda self: (
+                f"sapinvoices/{self.config.ALMA_SAP_INVOICES_CLOUDWATCH_LOG_GROUP}/"
+            ),
+            takes_self=True,
+        )
+    )
+    region_name: str | None = None
+    endpoint_url: str | None = None
+    summary_markers: tuple[str, ...] = SUMMARY_MARKERS
+    page_size: int | None = 100
+    summary_pattern: re.Pattern = field(
+        init=False,
+        default=Factory(
+            lambda self: re.compile("|".join(map(re.escape, self.summary_markers))),
+            takes_self=True,
+        ),
     )
 
     @property
     def client(self) -> "CloudWatchLogsClientType":
-        return boto3.client("logs")
+        return get_client(
+            "logs", region_name=self.region_name, endpoint_url=self.endpoint_url
+        )
 
-    def get_log_messages(self, task_id: str) -> list:
-        messages: list = []
-        if logs := self.get_log_events(task_id):
-            return self.get_log_summary(logs)
-        return messages
+    def get_log_messages(
+        self, task_id: str, mode: Literal["tail", "filter", "full"] = "tail"
+    ) -> list:
+        """Get summary of the logs for a task run.
+
+        The mode determines how the summary is retrieved from CloudWatch:
+
+        * "tail": Read the log stream backward from the end until the summary
+          is found (see CloudWatchLogsClient.get_log_summary_from_tail).
+        * "filter": Search the log stream for the summary marker and only
+          retrieve the log events from there on (see
+          CloudWatchLogsClient.get_log_summary_from_filter).
+        * "full": Read the entire log stream from the head and extract the
+          summary (see CloudWatchLogsClient.get_log_summary).
+
+        Every mode starts the summary at the last log event marking the start of
+        a summary, in case a run logs a summary marker more than once.
+
+        If the log stream is empty, an empty list is returned.
+        """
+        if mode == "tail":
+            return self.get_log_summary_from_tail(task_id)
+        if mode == "filter":
+            return self.get_log_summary_from_filter(task_id)
+        if mode == "full":
+            if logs := self.get_log_events(task_id):
+                return self.get_log_summary(logs)
+            return []
+        message = f"Cannot get log messages for unrecognized mode='{mode}'"
+        raise ValueError(message)
 
     def get_log_summary(self, logs: list[dict]) -> list[str]:
         """Get summary of SAP invoice processing logs.
 
-        This function will first determine the index of the log event
-        the marks the start of the "summary" log messages that
+        This function will first determine the index of the last log event
+        that marks the start of the "summary" log messages that
         describe the output of the SAP invoice processing run.
         The function will then retrieve all the messages starting from
         that index, effectively retrieving a summary of the run.
         """
-        summary_index: int | None = None
-        for index, event in enumerate(logs):
-            message = event["message"]
-            if (
-                "SAP invoice process completed" in message
-                or "No invoices waiting to be sent in Alma" in message
-            ):
-                summary_index = index
+        for summary_index in range(len(logs) - 1, -1, -1):
+            if self.summary_pattern.search(logs[summary_index]["message"]):
                 return [event["message"] for event in logs[summary_index:]]
         return ["SAP invoice process did not complete."]
 
+    def get_log_summary_from_tail(self, task_id: str) -> list[str]:
+        """Get summary of SAP invoice processing logs, reading from the tail.
+
+        The summary is at the end of the log stream, so rather than downloading
+        the entire log stream, pages of log events are read backward from the end
+        of the stream until the log event that marks the start of the summary
+        is found. For long runs, this retrieves a fraction of the log events.
+
+        Returns:
+            list[str]: Summary log messages. If the log stream is empty, an empty
+                list is returned; if the log stream does not include a summary,
+                a message saying the process did not complete is returned.
+        """
+        summary = self._get_log_summary_from_tail(task_id)
+        # without a page limit, the log stream is read up to its start
+        return summary if summary is not None else []
+
+    def get_log_summary_from_last_page(self, task_id: str) -> list[str] | None:
+        """Get summary of SAP invoice processing logs from the last page of logs.
+
+        Like get_log_summary_from_tail, but only the last page of log events is
+        requested (a single request to CloudWatch).
+
+        Returns:
+            list[str] | None: Summary log messages (as returned by
+                get_log_summary_from_tail), or None if the summary does not start
+                in the last page of log events.
+        """
+        return self._get_log_summary_from_tail(task_id, max_pages=1)
+
+    def _get_log_summary_from_tail(
+        self, task_id: str, max_pages: int | None = None
+    ) -> list[str] | None:
+        logger.info("Retrieving CloudWatch logs for task from the tail.")
+        params = {
+            "logGroupName": self.log_group_name,
+            "logStreamName": f"{self.log_stream_name_prefix}{task_id}",
+            "startFromHead": False,
+        }
+        if self.page_size:
+            params["limit"] = self.page_size
+
+        # pages of log events after the summary marker, from newest to oldest
+        pages: list[list] = []
+        client = self.client
+        while True:
+            try:
+                response = client.get_log_events(**params)  # type: ignore[arg-type]
+            except client.exceptions.ResourceNotFoundException as error:
+                raise ECSTaskLogStreamDoesNotExistError(task_id) from error
+            events = response["events"]
+            for index in range(len(events) - 1, -1, -1):
+                if self.summary_pattern.search(events[index]["message"]):
+                    logger.info("CloudWatch logs retrieved.")
+                    return [
+                        event["message"]
+                        for page in [events[index:], *reversed(pages)]
+                        for event in page
+                    ]
+            pages.append(events)
+            next_token = response.get("nextBackwardToken")
+            if next_token == params.get("nextToken"):
+                # the start of the stream is marked by returning the same token
+                break
+            if max_pages and len(pages) >= max_pages:
+                return None
+            params["nextToken"] = next_token
+
+        logger.info("CloudWatch logs retrieved.")
+        if any(pages):
+            return ["SAP invoice process did not complete."]
+        return []
+
+    def get_log_summary_from_filter(self, task_id: str) -> list[str]:
+        """Get summary of SAP invoice processing logs using server-side filtering.
+
+        Rather than downloading log events to search for the summary, CloudWatch
+        is asked for the log events matching each summary marker (as an exact
+        phrase); the last of them gives the timestamp at which the summary starts.
+        Only the log events at or after that timestamp are then retrieved.
+
+        Returns:
+            list[str]: Summary log messages. If the log stream is empty, an empty
+                list is returned; if the log stream does not include a summary,
+                a message saying the process did not complete is returned.
+        """
+        logger.info("Retrieving CloudWatch logs for task using filters.")
+        log_stream_name = f"{self.log_stream_name_prefix}{task_id}"
+        params = {
+            "logGroupName": self.log_group_name,
+            "logStreamNames": [log_stream_name],
+        }
+
+        marker_events = [
+            event
+            for marker in self.summary_markers
+            if (event := self._filter_last_log_event(params, marker))
+        ]
+        if not marker_events:
+            # distinguish between a missing, an empty, and an incomplete log stream
+            if self._get_first_log_event(task_id) is None:
+                return []
+            return ["SAP invoice process did not complete."]
+        marker_event = max(marker_events, key=lambda event: event["timestamp"])
+
+        # events sharing the marker's timestamp may precede it in the stream
+        messages: list[str] = []
+        is_summary = False
+        for event in self._filter_log_events(
+            {**params, "startTime": marker_event["timestamp"]}
+        ):
+            is_summary = is_summary or event["eventId"] == marker_event["eventId"]
+            if is_summary:
+                messages.append(event["message"])
+        logger.info("CloudWatch logs retrieved.")
+        return messages
+
+    def _filter_last_log_event(self, params: dict, marker: str) -> dict | None:
+        escaped_marker = marker.replace('"', '\\"')
+        # matching events are returned in stream order, so keep only the last one
+        events = deque(
+            self._filter_log_events({**params, "filterPattern": f'"{escaped_marker}"'}),
+            maxlen=1,
+        )
+        return events[0] if events else None
+
+    def _filter_log_events(self, params: dict) -> Iterator[dict]:
+        client = self.client
+        while True:
+            response = client.filter_log_events(**params)
+            yield from response["events"]  # type: ignore[misc]
+            if not (next_token := response.get("nextToken")):
+                return
+            params = {**params, "nextToken": next_token}
+
+    def _get_first_log_event(self, task_id: str) -> dict | None:
+        client = self.client
+        try:
+            response = client.get_log_events(
+                logGroupName=self.log_group_name,
+                logStreamName=f"{self.log_stream_name_prefix}{task_id}",
+                startFromHead=True,
+                limit=1,
+            )
+        except client.exceptions.ResourceNotFoundException as error:
+            raise ECSTaskLogStreamDoesNotExistError(task_id) from error
+        return next(iter(response["events"]), None)  # type: ignore[return-value]
+
+    def list_log_streams(
+        self, max_results: int, next_token: str | None = None, offset: int = 0
+    ) -> tuple[list["LogStreamTypeDef"], tuple[str | None, int] | None]:
+        """Get log streams of task runs, ordered by last event time (newest first).
+
+        CloudWatch cannot order log streams by 'LastEventTime' when filtering by
+        a log stream name prefix, so pages of log streams of the log group are
+        requested (following 'nextToken') and the log streams of task runs are
+        selected by 'log_stream_name_prefix', until 'max_results' log streams are
+        found or every log stream was listed.
+
+        Args:
+            max_results (int): Maximum number of log streams to return.
+            next_token (str | None, optional): Token of the page of log streams to
+                start from. Defaults to None (i.e., the first page).
+            offset (int, optional): Index of the log stream to start from in the
+                page. Defaults to 0.
+
+        Returns:
+            tuple[list[LogStreamTypeDef], tuple[str | None, int] | None]: Log streams
+                and the position ('next_token' and 'offset') to continue listing
+                from. The position is None once every log stream was listed.
+
+        Raises:
+            ValueError: If CloudWatch rejects the token (e.g., it has expired).
+        """
+        client = self.client
+        log_streams: list[LogStreamTypeDef] = []
+        while True:
+            params = {
+                "logGroupName": self.log_group_name,
+                "orderBy": "LastEventTime",
+                "descending": True,
+            }
+            if next_token:
+                params["nextToken"] = next_token
+            try:
+                response = client.describe_log_streams(**params)  # type: ignore[arg-type]
+            except client.exceptions.InvalidParameterException as error:
+                message = f"Invalid log streams token: '{next_token}'"
+                raise ValueError(message) from error
+
+            page = response["logStreams"]
+            for index in range(offset, len(page)):
+                if not page[index]["logStreamName"].startswith(
+                    self.log_stream_name_prefix
+                ):
+                    continue
+                log_streams.append(page[index])
+                if len(log_streams) == max_results:
+                    if index + 1 < len(page):
+                        return log_streams, (next_token, index + 1)
+                    if page_token := response.get("nextToken"):
+                        return log_streams, (page_token, 0)
+                    return log_streams, None
+
+            next_token, offset = response.get("nextToken"), 0
+            if not next_token:
+                return log_streams, None
+
     def get_log_events(self, task_id: str) -> list:
         logger.info("Retrieving CloudWatch logs for task.")
-        log_events = []
+        log_events, _ = self.get_new_log_events(task_id)
+        logger.info("CloudWatch logs retrieved.")
+        return log_events
+
+    def get_new_log_events(
+        self, task_id: str, cursor: str | None = None
+    ) -> tuple[list[dict], str | None]:
+        """Get log events added to the task's log stream since the cursor.
+
+        The cursor is the 'nextForwardToken' returned by CloudWatch after
+        reading to the end of the log stream. Passing it back on the next call
+        resumes reading where the previous call left off, so only new events are
+        retrieved. If no cursor is provided, the log stream is read from the head.
+
+        Args:
+            task_id (str): ECS task ID.
+            cursor (str | None, optional): Cursor returned by a previous call.
+                Defaults to None.
+
+        Returns:
+            tuple[list[dict], str | None]: New log events and the cursor to use
+                on the next call.
+        """
         params = {
             "logGroupName": self.log_group_name,
             "logStreamName": f"{self.log_stream_name_prefix}{task_id}",
             "startFromHead": True,
         }
+        if cursor:
+            params["nextToken"] = cursor
 
+        log_events = []
+        client = self.client
         while True:
             try:
-                response = self.client.get_log_events(**params)  # type: ignore[arg-type]
-            except self.client.exceptions.ResourceNotFoundException as error:
+                response = client.get_log_events(**params)  # type: ignore[arg-type]
+            except client.exceptions.ResourceNotFoundException as error:
                 raise ECSTaskLogStreamDoesNotExistError(task_id) from error
             log_events.extend(response["events"])
             next_token = response.get("nextForwardToken")
@@ -83,5 +377,4 @@ class CloudWatchLogsClient:
                 break
             params["nextToken"] = next_token
 
-        logger.info("CloudWatch logs retrieved.")
-        return log_events
+        return log_events, params.get("nextToken")  # type: ignore[return-value]
@@ -1,40 +1,83 @@
+import asyncio
 import logging
 import re
-import time
+from functools import cache
+from itertools import chain
 from typing import TYPE_CHECKING, Literal
 
-import boto3
-from attrs import define, field
+from attrs import Factory, define, field
 
 if TYPE_CHECKING:
     from mypy_boto3_ecs.client import ECSClient as ECSClientType
 
-from webapp.config import Config
+from webapp.config import ConfigSnapshot, get_config_snapshot
 from webapp.exceptions import (
     ECSTaskDefinitionDoesNotExistError,
     ECSTaskDoesNotExistError,
-    ECSTaskRuntimeExceededTimeoutError,
 )
+from webapp.utils.aws.clients import get_client
+from webapp.utils.cache import TTLCache
+from webapp.utils.instrumentation import ContextThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+# ECS describes at most 100 tasks per request
+DESCRIBE_TASKS_MAX_BATCH_SIZE = 100
+
+
+@cache
+def get_task_definition_cache() -> TTLCache[bool]:
+    """Get the cache of task definitions known to exist.
+
+    Task definitions rarely change, so a task definition found to exist is cached
+    for ECS_TASK_DEFINITION_CACHE_TTL seconds to skip looking it up
+    before every task run. Task definitions that do not exist are not cached.
+    """
+    return TTLCache(
+        ttl=get_config_snapshot().ECS_TASK_DEFINITION_CACHE_TTL, name="task_definitions"
+    )
+
 
 @define
 class ECSClient:
-    """ECS Client for running and monitoring task runs."""
+    """ECS Client for running and monitoring task runs.
+
+    Unless given, the cluster, task definition, network configuration and container
+    are read from the configuration snapshot ('config'), which defaults to the
+    snapshot of the process (see get_config_snapshot).
+    """
 
-    cluster: str = field(factory=lambda: Config().ALMA_SAP_INVOICES_ECS_CLUSTER)
+    config: ConfigSnapshot = field(factory=get_config_snapshot, kw_only=True)
+    cluster: str = field(
+        default=Factory(
+            lambda self: self.config.ALMA_SAP_INVOICES_ECS_CLUSTER, takes_self=True
+        )
+    )
     task_definition: str = field(
-        factory=lambda: Config().ALMA_SAP_INVOICES_ECS_TASK_DEFINITION
+        default=Factory(
+            lambda self: self.config.ALMA_SAP_INVOICES_ECS_TASK_DEFINITION,
+            takes_self=True,
+        )
     )
     network_configuration: dict = field(
-        factory=lambda: Config().ALMA_SAP_INVOICES_ECS_NETWORK_CONFIG
+        default=Factory(
+            lambda self: self.config.ALMA_SAP_INVOICES_ECS_NETWORK_CONFIG,
+            takes_self=True,
+        )
     )
-    container: str = field(factory=lambda: Config().ALMA_SAP_INVOICES_ECR_IMAGE_NAME)
+    container: str = field(
+        default=Factory(
+            lambda self: self.config.ALMA_SAP_INVOICES_ECR_IMAGE_NAME, takes_self=True
+        )
+    )
+    region_name: str | None = None
+    endpoint_url: str | None = None
 
     @property
     def client(self) -> "ECSClientType":
-        return boto3.client("ecs")
+        return get_client(
+            "ecs", region_name=self.region_name, endpoint_url=self.endpoint_url
+        )
 
     @property
     def task_family(self) -> str:
@@ -62,8 +105,12 @@ class ECSClient:
             message = f"Cannot run task for unrecognized run_type='{run_type}'"
             raise ValueError(message)
 
-        if self.task_definition_exists():
-            response = self.client.run_task(
+        if not self.task_definition_is_valid():
+            raise ECSTaskDefinitionDoesNotExistError(self.task_definition)
+
+        client = self.client
+        try:
+            response = client.run_task(
                 cluster=self.cluster,
                 launchType="FARGATE",
                 networkConfiguration=self.network_configuration,  # type: ignore[arg-type]
@@ -77,25 +124,59 @@ class ECSClient:
                 },
                 taskDefinition=self.task_definition,
             )
-            return response["tasks"][0]["taskArn"]
-        raise ECSTaskDefinitionDoesNotExistError(self.task_definition)
+        except (
+            client.exceptions.ClientException,
+            client.exceptions.InvalidParameterException,
+        ) as error:
+            # the cached task definition may have been deregistered since
+            get_task_definition_cache().delete(self.task_definition)
+            if not self.task_definition_exists():
+                raise ECSTaskDefinitionDoesNotExistError(self.task_definition) from error
+            raise
+        return response["tasks"][0]["taskArn"]
+
+    def preflight(self) -> dict | None:
+        """Run the checks required before executing an ECS task run.
+
+        The check for active tasks (only one task can run at a time) and the check
+        that the task definition exists are made concurrently. As the result of
+        the task definition check is cached, the following call to ECSClient.run
+        proceeds straight to running the task.
+
+        Returns:
+            dict | None: Active tasks (see ECSClient.get_active_tasks).
+
+        Raises:
+            ECSTaskDefinitionDoesNotExistError: If the task definition does not exist.
+        """
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            active_tasks = executor.submit(self.get_active_tasks)
+            task_definition_is_valid = executor.submit(self.task_definition_is_valid)
+        if not task_definition_is_valid.result():
+            raise ECSTaskDefinitionDoesNotExistError(self.task_definition)
+        return active_tasks.result()
 
     def monitor_task(self, task_id: str, timeout: int = 600) -> None:
-        """Polls ECS for task status updates.
+        """Polls ECS for task status updates until the task run completes.
+
+        The time between checks adapts to the stage of the ECS task lifecycle
+        (see webapp.utils.aws.monitor.TaskMonitor, which can also watch many
+        tasks at once).
 
-        This method will periodically (every 5 seconds) check for the status
-        of the running ECS task that matches the provided task ARN.
-        When the task run is complete, details of the run are returned.
+        Raises:
+            ECSTaskDoesNotExistError: If the task is not in the ECS task history.
+            ECSTaskRuntimeExceededTimeoutError: If the task is still running after
+                'timeout' seconds.
         """
-        start = time.time()
-        while True:
-            if time.time() - start > timeout:
-                raise ECSTaskRuntimeExceededTimeoutError(timeout)
-            task_status = self.get_task_status(task_id)
-            if task_status == "STOPPED":
-                logger.info("Task run has completed.")
-                break
-            time.sleep(5)
+        # imported here as the monitor module depends on this module
+        from webapp.utils.aws.monitor import TaskMonitor  # noqa: PLC0415
+
+        stopped = asyncio.run(
+            TaskMonitor(ecs_client=self, timeout=timeout).watch([task_id])
+        )
+        if stopped[task_id.rsplit("/", maxsplit=1)[-1]] is None:
+            raise ECSTaskDoesNotExistError(task_id)
+        logger.info("Task run has completed.")
 
     def get_task_status(self, task_id: str) -> str:
         """Get status of an ECS task.
@@ -109,31 +190,57 @@ class ECSClient:
         Returns:
             str: Status of an ECS task, representing a stage of the task lifecycle.
         """
-        if self.task_exists(task_id):
-            response = self.client.describe_tasks(cluster=self.cluster, tasks=[task_id])
-            task_status = response["tasks"][0]["lastStatus"]
+        if task := self.describe_task(task_id):
+            task_status = task["lastStatus"]
             message = f"Status for task {task_id}: {task_status}"
             logger.info(message)
             return task_status
         raise ECSTaskDoesNotExistError(task_id)
 
+    def describe_task(self, task_id: str) -> dict | None:
+        """Describe an ECS task with a single request to ECS.
+
+        ECS reports tasks that are not in its task history (e.g., tasks that stopped
+        more than an hour ago) as failures with reason "MISSING" rather than raising
+        an error, so the task is looked up directly instead of first checking that
+        it appears in the list of recently executed tasks.
+
+        Args:
+            task_id (str): ECS task ID or ARN.
+
+        Returns:
+            dict | None: Description of the ECS task, or None if the task
+                does not exist.
+        """
+        client = self.client
+        try:
+            response = client.describe_tasks(cluster=self.cluster, tasks=[task_id])
+        except client.exceptions.InvalidParameterException:
+            return None
+        for failure in response.get("failures", []):
+            logger.debug(f"Failed to describe task {task_id}: {failure.get('reason')}")
+        if tasks := response["tasks"]:
+            return tasks[0]  # type: ignore[return-value]
+        return None
+
     def get_active_tasks(self) -> dict | None:
         """Get active ECS tasks.
 
         Tasks are considered 'active' when their 'lastStatus'
-        is not "STOPPED". The method returns a dictionary of
-        task IDs, sorted by the 'createdAt' timestamps in
-        descending (most recent) order.
+        is not "STOPPED". Only tasks with the desired status
+        "RUNNING" (which includes pending tasks) are listed, as
+        stopped tasks are never active. The method returns a
+        dictionary of task IDs, sorted by the 'createdAt'
+        timestamps in descending (most recent) order.
 
         Returns:
             dict: Active task IDs (keys) and the corresponding
                 'createdAt' timestamps (values).
         """
-        if any(tasks := self.get_tasks()):
-            response = self.client.describe_tasks(cluster=self.cluster, tasks=tasks)
+        if any(tasks := self.list_tasks("RUNNING")):
             active_tasks = {
                 task["taskArn"].split("/")[-1]: task["createdAt"]
-                for task in response["tasks"]
+                for task in self.describe_tasks(tasks)
                 if task["lastStatus"] != "STOPPED"
             }
             return dict(
@@ -141,12 +248,37 @@ class ECSClient:
             )
         return None
 
+    def describe_tasks(self, tasks: list[str]) -> list[dict]:
+        """Describe ECS tasks in concurrent batches.
+
+        ECS can only describe up to 100 tasks per request, so the tasks are split
+        into batches of 100 which are described concurrently.
+
+        Args:
+            tasks (list[str]): ECS task IDs or ARNs.
+
+        Returns:
+            list[dict]: Descriptions of the ECS tasks that exist.
+        """
+        batches = [
+            tasks[index : index + DESCRIBE_TASKS_MAX_BATCH_SIZE]
+            for index in range(0, len(tasks), DESCRIBE_TASKS_MAX_BATCH_SIZE)
+        ]
+        client = self.client
+
+        def describe_batch(batch: list[str]) -> list:
+            return client.describe_tasks(cluster=self.cluster, tasks=batch)["tasks"]
+
+        if len(batches) <= 1:
+            return list(chain.from_iterable(map(describe_batch, batches)))
+        with ContextThreadPoolExecutor(max_workers=len(batches)) as executor:
+            return list(chain.from_iterable(executor.map(describe_batch, batches)))
+
     def task_exists(self, task_id: str) -> bool:
         """Determine if the task exists.
 
         Given a task ID, this method will determine whether the task
-        exists by looping through the list of ARNs recently executed ECS
-        tasks and checking if the task ID appears in any of the task ARNs.
+        exists by describing the task (see ECSClient.describe_task).
 
         Note: Task runs are retained by ECS for a limited amount of time.
 
@@ -156,7 +288,7 @@ class ECSClient:
         Returns:
             bool: If task run exists, return True, else False.
         """
-        return any(task_id in task_arn for task_arn in self.get_tasks())
+        return self.describe_task(task_id) is not None
 
     def task_definition_exists(self) -> bool:
         """Determine if the task definition exists.
@@ -174,14 +306,37 @@ class ECSClient:
         ]
         return self.task_family_revision in existing_task_definitions
 
+    def task_definition_is_valid(self) -> bool:
+        """Determine if the task definition exists, using cached results.
+
+        See ECSClient.task_definition_exists and get_task_definition_cache.
+        """
+        task_definition_cache = get_task_definition_cache()
+        if task_definition_cache.get(self.task_definition):
+            return True
+        if exists := self.task_definition_exists():
+            task_definition_cache.set(self.task_definition, exists)
+        return exists
+
     def get_tasks(self) -> list[str]:
-        """Get list of all ECS tasks."""
-        existing_tasks = set()
-        for status in ["RUNNING", "PENDING", "STOPPED"]:
-            response = self.client.list_tasks(
-                cluster=self.cluster,
-                family=self.task_family,
-                desiredStatus=status,  # type: ignore[arg-type]
+        """Get list of all ECS tasks.
+
+        Tasks are listed for each desired status ("RUNNING", "PENDING", "STOPPED")
+        concurrently, following every page of results.
+        """
+        statuses = ["RUNNING", "PENDING", "STOPPED"]
+        with ContextThreadPoolExecutor(max_workers=len(statuses)) as executor:
+            existing_tasks = set(
+                chain.from_iterable(executor.map(self.list_tasks, statuses))
             )
-            existing_tasks.update(response["taskArns"])
         return list(existing_tasks)
+
+    def list_tasks(self, desired_status: str) -> list[str]:
+        """Get list of all ECS task ARNs with the desired status."""
+        paginator = self.client.get_paginator("list_tasks")
+        pages = paginator.paginate(
+            cluster=self.cluster,
+            family=self.task_family,
+            desiredStatus=desired_status,  # type: ignore[arg-type]
+        )
+        return [task_arn for page in pages for task_arn in page["taskArns"]]
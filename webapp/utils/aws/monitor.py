@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import inspect
+import logging
+import sys
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+from attrs import define, field
+
+from webapp.config import configure_logger, get_config_snapshot
+from webapp.exceptions import ECSTaskRuntimeExceededTimeoutError
+from webapp.utils.aws.ecs import ECSClient
+
+logger = logging.getLogger(__name__)
+
+# minimum and maximum number of seconds between status checks for each stage
+# of the ECS task lifecycle; tasks that are starting or stopping change status
+# within seconds, while running tasks may not change status for several minutes
+POLL_INTERVALS: dict[str, tuple[float, float]] = {
+    "PROVISIONING": (1, 5),
+    "PENDING": (1, 5),
+    "ACTIVATING": (1, 5),
+    "RUNNING": (10, 60),
+    "DEACTIVATING": (2, 10),
+    "STOPPING": (2, 10),
+    "DEPROVISIONING": (2, 10),
+}
+
+type StatusChangeCallback = Callable[[str, str], Awaitable[None] | None]
+type StoppedCallback = Callable[[str, dict | None], Awaitable[None] | None]
+
+
+@define
+class TaskMonitor:
+    """Monitor for ECS task runs.
+
+    The monitor watches many tasks at once: on every check, the status of all
+    watched tasks is retrieved with a single (batched) 'describe_tasks' request.
+    The time between checks depends on the lifecycle stage of the watched tasks
+    (see POLL_INTERVALS), starting at the stage's minimum interval and backing
+    off by a factor of 'backoff' for every check without a status change, up to
+    the stage's maximum interval. The next check is scheduled for the task that
+    needs it soonest.
+
+    Callbacks (functions or coroutine functions) are called when the status of a
+    task changes ('on_status_change') and when a task stops ('on_stopped') or is
+    no longer found in the ECS task history, in which case None is passed in
+    place of the task description.
+    """
+
+    ecs_client: ECSClient = field(factory=ECSClient)
+    timeout: int = 600
+    backoff: float = 1.5
+    poll_intervals: dict[str, tuple[float, float]] = field(
+        factory=lambda: dict(POLL_INTERVALS)
+    )
+    default_poll_interval: tuple[float, float] = (5, 30)
+    on_status_change: StatusChangeCallback | None = None
+    on_stopped: StoppedCallback | None = None
+
+    async def watch(self, task_ids: Iterable[str]) -> dict[str, dict | None]:
+        """Watch ECS tasks until all of them have stopped.
+
+        Args:
+            task_ids (Iterable[str]): ECS task IDs or ARNs.
+
+        Returns:
+            dict[str, dict | None]: Descriptions of the stopped ECS tasks by task ID
+                (None for tasks not found in the ECS task history).
+
+        Raises:
+            ECSTaskRuntimeExceededTimeoutError: If any task is still running after
+                'timeout' seconds.
+        """
+        # status of each watched task and number of checks since it last changed
+        watched: dict[str, tuple[str | None, int]] = {
+            task_id.split("/")[-1]: (None, 0) for task_id in task_ids
+        }
+        stopped: dict[str, dict | None] = {}
+        start = time.monotonic()
+        while watched:
+            if time.monotonic() - start > self.timeout:
+                raise ECSTaskRuntimeExceededTimeoutError(self.timeout)
+
+            tasks = await asyncio.to_thread(self.ecs_client.describe_tasks, [*watched])
+            descriptions = {task["taskArn"].split("/")[-1]: task for task in tasks}
+            for task_id, (previous_status, unchanged_checks) in list(watched.items()):
+                if (task := descriptions.get(task_id)) is None:
+                    logger.warning(f"Task {task_id} not found in ECS task history.")
+                    del watched[task_id]
+                    stopped[task_id] = None
+                    await self._call(self.on_stopped, task_id, None)
+                    continue
+
+                status = task["lastStatus"]
+                if status == previous_status:
+                    watched[task_id] = (status, unchanged_checks + 1)
+                    continue
+                logger.info(f"Status for task {task_id}: {status}")
+                await self._call(self.on_status_change, task_id, status)
+                if status == "STOPPED":
+                    del watched[task_id]
+                    stopped[task_id] = task
+                    await self._call(self.on_stopped, task_id, task)
+                else:
+                    watched[task_id] = (status, 0)
+
+            if watched:
+                remaining = self.timeout - (time.monotonic() - start)
+                await asyncio.sleep(
+                    max(0, min(self.get_poll_interval(watched.values()), remaining))
+                )
+        return stopped
+
+    def get_poll_interval(self, statuses: Iterable[tuple[str | None, int]]) -> float:
+        """Get the number of seconds until the next check.
+
+        Args:
+            statuses (Iterable[tuple[str | None, int]]): Status of each watched task
+                and the number of checks since it last changed.
+        """
+        intervals = []
+        for status, unchanged_checks in statuses:
+            minimum, maximum = self.poll_intervals.get(
+                status or "", self.default_poll_interval
+            )
+            intervals.append(min(minimum * self.backoff**unchanged_checks, maximum))
+        return min(intervals, default=0)
+
+    @staticmethod
+    async def _call(
+        callback: Callable[..., Awaitable[None] | None] | None, *args: object
+    ) -> None:
+        if callback is not None and inspect.isawaitable(result := callback(*args)):
+            await result
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Watch ECS task runs from the command line until they stop.
+
+    Returns:
+        int: Exit status, 0 if every task stopped with its containers exiting
+            successfully, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        prog="sapinvoices_monitor",
+        description="Watch SAP invoice processing runs (ECS tasks) until they stop.",
+    )
+    parser.add_argument("task_ids", nargs="+", metavar="TASK_ID", help="ECS task ID")
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=600,
+        help="Number of seconds to wait for the tasks to stop (default: 600).",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log debug output.")
+    args = parser.parse_args(argv)
+
+    get_config_snapshot()
+    configure_logger(verbose=args.verbose)
+
+    def print_stopped(task_id: str, task: dict | None) -> None:
+        if task is None:
+            message = "not found in ECS task history"
+        else:
+            exit_codes = [container.get("exitCode") for container in task["containers"]]
+            message = f"{task.get('stoppedReason', 'stopped')} (exit codes: {exit_codes})"
+        print(f"{task_id}: {message}")  # noqa: T201
+
+    monitor = TaskMonitor(
+        timeout=args.timeout,
+        on_status_change=lambda task_id, status: print(  # noqa: T201
+            f"{task_id}: {status}"
+        ),
+        on_stopped=print_stopped,
+    )
+    try:
+        stopped = asyncio.run(monitor.watch(args.task_ids))
+    except ECSTaskRuntimeExceededTimeoutError as exception:
+        print(exception, file=sys.stderr)  # noqa: T201
+        return 1
+    succeeded = all(
+        task is not None
+        and all(container.get("exitCode") == 0 for container in task["containers"])
+        for task in stopped.values()
+    )
+    return 0 if succeeded else 1
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+from weakref import WeakValueDictionary
+
+from attrs import define, field
+
+# named caches of the process, for reporting (see get_cache_stats)
+_named_caches: WeakValueDictionary[str, "TTLCache[Any]"] = WeakValueDictionary()
+
+
+@define
+class TTLCache[V]:
+    """Thread-safe, in-process cache with LRU eviction and optional TTL.
+
+    Entries are evicted in least-recently-used order once the cache holds
+    'maxsize' entries. If a 'ttl' (in seconds) is set, entries expire 'ttl'
+    seconds after they are set; expired entries are not returned by 'get'
+    unless 'allow_stale=True', which lets callers fall back to the last known
+    value when refreshing it fails.
+
+    Caches are scoped to the process, meaning values live for the lifetime
+    of a warm Lambda container. Lookups are counted as hits or misses
+    (see TTLCache.stats). The stats of caches given a 'name' are reported
+    by get_cache_stats; a cache replaces any earlier cache with the same name.
+    """
+
+    maxsize: int = 128
+    ttl: float | None = None
+    timer: Callable[[], float] = time.monotonic
+    name: str | None = field(default=None, kw_only=True)
+    _entries: OrderedDict[Hashable, tuple[V, float | None]] = field(
+        init=False, factory=OrderedDict
+    )
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+    _lock: threading.RLock = field(init=False, factory=threading.RLock)
+
+    def __attrs_post_init__(self) -> None:
+        """Register the cache by name (see get_cache_stats)."""
+        if self.name is not None:
+            _named_caches[self.name] = self
+
+    def __len__(self) -> int:
+        """Number of entries in the cache, including expired entries."""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether the cache holds an unexpired entry for the key."""
+        return self.get(key) is not None
+
+    def get(
+        self, key: Hashable, default: V | None = None, *, allow_stale: bool = False
+    ) -> V | None:
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if not allow_stale and expires_at is not None and self.timer() >= expires_at:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: V, ttl: float | None = None) -> None:
+        """Add or replace a value, evicting the least recently used if full.
+
+        Args:
+            key (Hashable): Cache key.
+            value (V): Value to cache.
+            ttl (float | None, optional): Override the cache-wide TTL (in seconds)
+                for this entry. Defaults to TTLCache.ttl.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else self.timer() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Get the size of the cache and its hit and miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_cache_stats() -> dict[str, dict[str, int | float]]:
+    """Get the stats of every named cache of the process by name.
+
+    Only caches that exist are reported, so reporting does not create caches
+    (e.g., the public key cache, which is only created on the first login).
+    """
+    return {name: cache.stats() for name, cache in list(_named_caches.items())}
@@ -0,0 +1,81 @@
+import gzip
+import logging
+
+from werkzeug.wrappers import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = (
+    "application/javascript",
+    "application/json",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+)
+# favor speed over size: higher levels cost CPU time for little gain on text
+GZIP_COMPRESS_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def get_supported_encodings() -> list[str]:
+    """Get the content encodings supported for responses, in order of preference.
+
+    Brotli ("br") is only supported if the optional 'brotli' package is installed.
+    """
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress_response(response: Response, request: Request, min_size: int) -> Response:
+    """Compress a response with the best encoding accepted by the client.
+
+    Only successful responses with a compressible content type (see
+    COMPRESSIBLE_MIMETYPES) and a body of at least 'min_size' bytes are compressed;
+    small bodies gain little from compression. Streamed responses (e.g., server-sent
+    events) are never compressed, as they would be buffered.
+
+    The compressed body is a different representation of the resource, so a strong
+    ETag is made weak. Responses that may be compressed vary on 'Accept-Encoding'.
+
+    Args:
+        response (Response): Response to compress.
+        request (Request): Request, for the 'Accept-Encoding' header.
+        min_size (int): Minimum size (in bytes) of the body to compress.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or not 200 <= response.status_code < 300  # noqa: PLR2004
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    encoding = request.accept_encodings.best_match(get_supported_encodings())
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    if encoding == "br":
+        compressed_data = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        compressed_data = gzip.compress(data, compresslevel=GZIP_COMPRESS_LEVEL, mtime=0)
+    response.set_data(compressed_data)
+    response.headers["Content-Encoding"] = encoding
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    logger.debug(
+        f"Compressed response with {encoding}: "
+        f"{len(data)} -> {len(compressed_data)} bytes"
+    )
+    return response
@@ -0,0 +1,208 @@
+import json
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import UTC, datetime
+from functools import cache
+from typing import Any
+
+from attrs import asdict, define, evolve, field
+
+from webapp.config import get_config_snapshot
+from webapp.utils.aws.clients import get_client
+
+logger = logging.getLogger(__name__)
+
+
+@define
+class RunRecord:
+    """Record of an executed SAP invoice processing run (i.e., an ECS task run).
+
+    Timestamps are ISO 8601 strings in UTC. The 'status' and 'summary' are set
+    when the run completes (see RunHistoryStore.record_completion), along with
+    'stopped_at' if the time the ECS task stopped is known.
+    """
+
+    task_id: str
+    run_type: str | None = None
+    user: str | None = None
+    started_at: str | None = None
+    stopped_at: str | None = None
+    status: str | None = None
+    summary: list[str] | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunRecord":
+        return cls(**data)
+
+
+class RunHistoryStore(ABC):
+    """Store of executed runs, so that old runs resolve without calls to ECS.
+
+    ECS only retains stopped tasks for about an hour and CloudWatch log streams
+    eventually expire, so looking up an old run requires a chain of requests to
+    AWS (and may fail). Instead, runs are recorded when they are launched and when
+    they complete, and looked up by task ID with a single read.
+    """
+
+    @abstractmethod
+    def get(self, task_id: str) -> RunRecord | None:
+        """Get the record of a run by task ID, if recorded."""
+
+    @abstractmethod
+    def put(self, record: RunRecord) -> None:
+        """Add or replace the record of a run."""
+
+    def record_launch(
+        self, task_id: str, run_type: str, user: str | None = None
+    ) -> RunRecord:
+        record = RunRecord(
+            task_id=task_id,
+            run_type=run_type,
+            user=user,
+            started_at=datetime.now(tz=UTC).isoformat(),
+        )
+        self.put(record)
+        return record
+
+    def record_completion(
+        self,
+        task_id: str,
+        status: str,
+        summary: list[str],
+        stopped_at: datetime | None = None,
+    ) -> RunRecord:
+        record = self.get(task_id) or RunRecord(task_id=task_id)
+        if record.status == "COMPLETED":
+            # the result of a completed run does not change
+            return record
+        record = evolve(
+            record,
+            stopped_at=stopped_at.astimezone(UTC).isoformat() if stopped_at else None,
+            status=status,
+            summary=summary,
+        )
+        self.put(record)
+        return record
+
+
+@define
+class SQLiteRunHistoryStore(RunHistoryStore):
+    """Run history store backed by a SQLite database (for local use and testing).
+
+    Runs are stored in a 'runs' table with the task ID as its primary key. The
+    connection is shared by threads, so access to it is serialized with a lock.
+    """
+
+    path: str = ":memory:"
+    _connection: sqlite3.Connection = field(init=False)
+    _lock: threading.Lock = field(init=False, factory=threading.Lock)
+
+    def __attrs_post_init__(self) -> None:
+        """Connect to the database and create the 'runs' table if needed."""
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    task_id TEXT PRIMARY KEY,
+                    run_type TEXT,
+                    user TEXT,
+                    started_at TEXT,
+                    stopped_at TEXT,
+                    status TEXT,
+                    summary TEXT
+                )
+                """)
+
+    def get(self, task_id: str) -> RunRecord | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT task_id, run_type, user, started_at, stopped_at, status, summary "
+                "FROM runs WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        task_id, run_type, user, started_at, stopped_at, status, summary = row
+        return RunRecord(
+            task_id=task_id,
+            run_type=run_type,
+            user=user,
+            started_at=started_at,
+            stopped_at=stopped_at,
+            status=status,
+            summary=json.loads(summary) if summary else None,
+        )
+
+    def put(self, record: RunRecord) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.task_id,
+                    record.run_type,
+                    record.user,
+                    record.started_at,
+                    record.stopped_at,
+                    record.status,
+                    json.dumps(record.summary) if record.summary is not None else None,
+                ),
+            )
+
+
+@define
+class S3RunHistoryStore(RunHistoryStore):
+    """Run history store backed by an S3 bucket.
+
+    Each run is stored as a JSON object at '<prefix><task ID>.json'.
+    """
+
+    bucket: str
+    prefix: str = "run-history/"
+
+    @property
+    def client(self) -> Any:  # noqa: ANN401
+        return get_client("s3")
+
+    def get(self, task_id: str) -> RunRecord | None:
+        client = self.client
+        try:
+            response = client.get_object(Bucket=self.bucket, Key=self._key(task_id))
+        except client.exceptions.ClientError as error:
+            # without s3:ListBucket, S3 denies access to a missing key
+            # rather than reporting that it does not exist
+            if error.response["Error"]["Code"] in {"NoSuchKey", "AccessDenied"}:
+                return None
+            raise
+        return RunRecord.from_dict(json.loads(response["Body"].read()))
+
+    def put(self, record: RunRecord) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(record.task_id),
+            Body=json.dumps(asdict(record)).encode(),
+            ContentType="application/json",
+        )
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.prefix}{task_id}.json"
+
+
+@cache
+def get_run_history_store() -> RunHistoryStore | None:
+    """Get the run history store configured by RUN_HISTORY_STORE.
+
+    Returns None if no run history store is configured. The value of
+    RUN_HISTORY_STORE is validated by the configuration snapshot.
+    """
+    config = get_config_snapshot()
+    if config.RUN_HISTORY_STORE == "sqlite":
+        return SQLiteRunHistoryStore(path=config.RUN_HISTORY_SQLITE_PATH)
+    if config.RUN_HISTORY_STORE == "s3":
+        # the snapshot requires RUN_HISTORY_S3_BUCKET when RUN_HISTORY_STORE=s3
+        return S3RunHistoryStore(
+            bucket=config.RUN_HISTORY_S3_BUCKET,  # type: ignore[arg-type]
+            prefix=config.RUN_HISTORY_S3_PREFIX,
+        )
+    return None
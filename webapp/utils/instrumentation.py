@@ -0,0 +1,178 @@
+import contextvars
+import json
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from attrs import define
+
+if TYPE_CHECKING:
+    from botocore.awsrequest import AWSResponse
+    from botocore.hooks import BaseEventHooks
+    from botocore.model import OperationModel
+
+logger = logging.getLogger(__name__)
+
+# key of the call details added to the botocore request context in 'before-call'
+_REQUEST_CONTEXT_KEY = "aws_call_instrumentation"
+
+_aws_calls: contextvars.ContextVar[list["AWSCall"] | None] = contextvars.ContextVar(
+    "aws_calls", default=None
+)
+
+
+@define
+class AWSCall:
+    """An AWS API operation called by a boto3 client.
+
+    The duration (in seconds) covers the whole call as made by the client,
+    including retries. Calls that returned an error response or did not get a
+    response at all are marked as failed.
+    """
+
+    service: str
+    operation: str
+    duration: float
+    failed: bool = False
+
+
+def start_recording_aws_calls() -> list[AWSCall]:
+    """Start recording the AWS calls made in the current context.
+
+    Calls are recorded by the botocore event hooks of the clients in the client
+    registry (see register_aws_call_hooks), in threads started with
+    ContextThreadPoolExecutor and in 'asyncio.to_thread' as well. Any recording
+    already started in the context is replaced.
+
+    Returns:
+        list[AWSCall]: Recorded calls, updated as calls are made.
+    """
+    calls: list[AWSCall] = []
+    _aws_calls.set(calls)
+    return calls
+
+
+def stop_recording_aws_calls() -> list[AWSCall]:
+    """Stop recording the AWS calls made in the current context.
+
+    Returns:
+        list[AWSCall]: Calls recorded since start_recording_aws_calls.
+    """
+    calls = _aws_calls.get() or []
+    _aws_calls.set(None)
+    return calls
+
+
+def register_aws_call_hooks(events: "BaseEventHooks") -> None:
+    """Register botocore event hooks that record the AWS calls made by a client.
+
+    Args:
+        events (BaseEventHooks): Event hooks of the client ('client.meta.events').
+    """
+    events.register("before-call", _start_aws_call)
+    events.register("after-call", _end_aws_call)
+    events.register("after-call-error", _end_aws_call)
+
+
+def _start_aws_call(
+    model: "OperationModel", context: dict[str, Any], **_: Any  # noqa: ANN401
+) -> None:
+    if _aws_calls.get() is not None:
+        context[_REQUEST_CONTEXT_KEY] = (
+            model.service_model.service_name,
+            model.name,
+            time.perf_counter(),
+        )
+
+
+def _end_aws_call(
+    context: dict[str, Any],
+    http_response: "AWSResponse | None" = None,
+    **_: Any,  # noqa: ANN401
+) -> None:
+    calls = _aws_calls.get()
+    call_details = context.pop(_REQUEST_CONTEXT_KEY, None)
+    if calls is None or call_details is None:
+        return
+    service, operation, start = call_details
+    # 'after-call-error' (the request failed without a response) has no response
+    failed = http_response is None or http_response.status_code >= 300  # noqa: PLR2004
+    calls.append(AWSCall(service, operation, time.perf_counter() - start, failed))
+
+
+def format_server_timing(calls: list[AWSCall], total: float) -> str:
+    """Format the value of a 'Server-Timing' response header.
+
+    The header has a metric for each AWS operation called, with the number of
+    calls and their total duration, followed by the total duration of all AWS
+    calls ('aws', which exceeds their wall-clock time if calls were made in
+    parallel) and the duration of the whole request ('total'). Durations are in
+    milliseconds.
+
+    Args:
+        calls (list[AWSCall]): AWS calls made while handling the request.
+        total (float): Duration (in seconds) of the request.
+    """
+    metrics = [
+        f'{name};dur={duration * 1000:.1f};desc="{count} call{"s" * (count != 1)}"'
+        for name, (count, duration) in summarize_aws_calls(calls).items()
+    ]
+    metrics.append(f"aws;dur={sum(call.duration for call in calls) * 1000:.1f}")
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+def summarize_aws_calls(calls: list[AWSCall]) -> dict[str, tuple[int, float]]:
+    """Get the number and total duration (in seconds) of calls by operation.
+
+    Operations are named '<service>.<operation>' (e.g., 'ecs.ListTasks') and
+    listed in the order they were first called.
+    """
+    summary: dict[str, tuple[int, float]] = {}
+    for call in calls:
+        name = f"{call.service}.{call.operation}"
+        count, duration = summary.get(name, (0, 0.0))
+        summary[name] = (count + 1, duration + call.duration)
+    return summary
+
+
+def log_request_timing(
+    method: str, path: str, status: int, duration: float, calls: list[AWSCall]
+) -> None:
+    """Log the duration and AWS calls of a request as a single JSON line."""
+    logger.info(
+        json.dumps(
+            {
+                "message": "Request timing",
+                "method": method,
+                "path": path,
+                "status": status,
+                "duration_ms": round(duration * 1000, 1),
+                "aws_calls": len(calls),
+                "aws_failed_calls": sum(call.failed for call in calls),
+                "aws_duration_ms": round(sum(call.duration for call in calls) * 1000, 1),
+                "aws_operations": {
+                    name: {"calls": count, "duration_ms": round(duration * 1000, 1)}
+                    for name, (count, duration) in summarize_aws_calls(calls).items()
+                },
+            }
+        )
+    )
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool executor running tasks in the context of the submitting thread.
+
+    Context variables are not propagated to the threads of a ThreadPoolExecutor,
+    so, for example, AWS calls made in the threads would not be recorded for the
+    request that submitted them. Each task is run in a copy of the context of the
+    thread that submitted it, as with 'asyncio.to_thread'.
+    """
+
+    def submit[T](
+        self, fn: Callable[..., T], /, *args: Any, **kwargs: Any  # noqa: ANN401
+    ) -> Future[T]:
+        context = contextvars.copy_context()
+        return super().submit(context.run, fn, *args, **kwargs)
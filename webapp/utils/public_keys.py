@@ -0,0 +1,101 @@
+import logging
+import threading
+from concurrent.futures import Future
+from functools import cache
+
+import requests
+from attrs import Factory, define, field
+
+from webapp.config import get_config_snapshot
+from webapp.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@define
+class PublicKeyCache:
+    """Cache of the public keys used by the ALB to sign OIDC user claims.
+
+    The ALB signs user claims with a key identified by the 'kid' in the JWT
+    headers; the matching public key is published at a regional endpoint.
+    This class caches public keys by key ID (with TTL and LRU eviction) and
+    fetches missing keys through a pooled HTTP session.
+
+    Fetches are 'single-flight': if several threads request the same missing
+    key at once, only one request is made to the endpoint and the others wait
+    for its result. If a fetch fails and an expired copy of the key is still
+    cached, the stale key is returned instead of failing the login.
+    """
+
+    region: str
+    ttl: float = 3600
+    maxsize: int = 32
+    timeout: float = 5
+    _keys: TTLCache[str] = field(
+        init=False,
+        default=Factory(
+            lambda self: TTLCache(maxsize=self.maxsize, ttl=self.ttl, name="public_keys"),
+            takes_self=True,
+        ),
+    )
+    _session: requests.Session = field(init=False, factory=requests.Session)
+    _inflight: dict[str, Future[str]] = field(init=False, factory=dict)
+    _lock: threading.Lock = field(init=False, factory=threading.Lock)
+
+    def get(self, key_id: str) -> str:
+        """Get the public key for a key ID, fetching it if not cached."""
+        if (public_key := self._keys.get(key_id)) is not None:
+            return public_key
+
+        with self._lock:
+            if (public_key := self._keys.get(key_id)) is not None:
+                return public_key
+            future = self._inflight.get(key_id)
+            is_leader = future is None
+            if future is None:
+                future = self._inflight[key_id] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            public_key = self._fetch(key_id)
+        except Exception as exception:
+            future.set_exception(exception)
+            raise
+        else:
+            future.set_result(public_key)
+        finally:
+            with self._lock:
+                self._inflight.pop(key_id, None)
+        return public_key
+
+    def clear(self) -> None:
+        self._keys.clear()
+
+    def _fetch(self, key_id: str) -> str:
+        url = f"https://public-keys.auth.elb.{self.region}.amazonaws.com/{key_id}"
+        try:
+            response = self._session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as exception:
+            if (stale_key := self._keys.get(key_id, allow_stale=True)) is not None:
+                logger.warning(
+                    f"Failed to refresh public key '{key_id}', "
+                    f"using cached key: {exception}"
+                )
+                return stale_key
+            raise
+        self._keys.set(key_id, response.text)
+        return response.text
+
+
+@cache
+def get_public_key_cache() -> PublicKeyCache:
+    """Get the public key cache shared by the process."""
+    config = get_config_snapshot()
+    return PublicKeyCache(
+        region=config.AWS_DEFAULT_REGION,
+        ttl=config.ALB_PUBLIC_KEY_CACHE_TTL,
+        timeout=config.ALB_PUBLIC_KEY_FETCH_TIMEOUT,
+    )
@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from functools import cache
+
+from flask import abort, current_app, redirect, request, send_file, url_for
+from werkzeug.security import safe_join
+from werkzeug.wrappers import Response
+
+from webapp.utils.compression import COMPRESSIBLE_MIMETYPES, brotli
+
+logger = logging.getLogger(__name__)
+
+# file extensions of precompressed variants, in order of preference
+PRECOMPRESSED_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+# fingerprinted URLs change whenever the content changes, so they never go stale
+IMMUTABLE_MAX_AGE = 31536000
+
+
+@cache
+def get_asset_fingerprint(path: str) -> str:
+    """Get the fingerprint (a hash of the content) of a static asset.
+
+    Static assets do not change during the lifetime of the process, so each asset
+    is only hashed once.
+    """
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:16]
+
+
+def asset_url(filename: str) -> str:
+    """Get the fingerprinted URL of a static asset (for use in templates).
+
+    Unlike url_for('static', filename=...), the URL includes the fingerprint of the
+    asset, so the asset can be cached by browsers until its content changes.
+    """
+    path = _get_asset_path(filename)
+    return url_for(
+        "static_asset", fingerprint=get_asset_fingerprint(path), filename=filename
+    )
+
+
+def send_static_asset(fingerprint: str, filename: str) -> Response:
+    """Send a static asset requested by its fingerprinted URL.
+
+    The response may be cached by browsers forever ('immutable'). If a precompressed
+    variant of the asset (see precompress_static_assets) is accepted by the client,
+    it is sent instead. Requests for an outdated fingerprint are redirected to the
+    current URL of the asset.
+    """
+    path = _get_asset_path(filename)
+    if fingerprint != get_asset_fingerprint(path):
+        return redirect(asset_url(filename))
+
+    encoding = request.accept_encodings.best_match(
+        [
+            encoding
+            for encoding, extension in PRECOMPRESSED_EXTENSIONS.items()
+            if os.path.isfile(path + extension)
+        ]
+    )
+    mimetype = mimetypes.guess_type(filename)[0]
+    if encoding:
+        response = send_file(path + PRECOMPRESSED_EXTENSIONS[encoding], mimetype=mimetype)
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_file(path, mimetype=mimetype)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def precompress_static_assets(static_folder: str) -> list[str]:
+    """Write compressed variants of the compressible static assets in a folder.
+
+    Intended to run when the image is built, so that compressed static assets are
+    served without compressing them on every request. A gzip ('.gz') variant is
+    written for every compressible asset, and a brotli ('.br') variant if the
+    optional 'brotli' package is installed. Variants that are not smaller than the
+    asset are not written.
+
+    Returns:
+        list[str]: Paths of the written variants.
+    """
+    written = []
+    for directory, _, filenames in os.walk(static_folder):
+        for filename in filenames:
+            if mimetypes.guess_type(filename)[0] not in COMPRESSIBLE_MIMETYPES:
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, "rb") as file:
+                data = file.read()
+            variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+            for extension, compressed_data in variants.items():
+                if len(compressed_data) >= len(data):
+                    continue
+                with open(path + extension, "wb") as file:
+                    file.write(compressed_data)
+                logger.info(f"Wrote {path + extension} ({len(compressed_data)} bytes)")
+                written.append(path + extension)
+    return written
+
+
+def _get_asset_path(filename: str) -> str:
+    path = safe_join(current_app.static_folder or "", filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    return path
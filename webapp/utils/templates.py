@@ -0,0 +1,84 @@
+import logging
+import os
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+from webapp.config import Config
+
+logger = logging.getLogger(__name__)
+
+# directory of the bytecode of the templates compiled when the image is built
+DEFAULT_TEMPLATE_BYTECODE_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "template_cache"
+)
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Jinja bytecode cache of templates compiled ahead of time.
+
+    Jinja compiles a template to Python bytecode the first time it is rendered in
+    a process, which adds to the time of the first request after a cold start.
+    With this cache, the bytecode of every template is written when the image is
+    built (see compile_templates) and loaded instead of compiling the template.
+    Jinja checks the bytecode against the template source, so a changed template
+    is compiled as usual.
+
+    The Lambda file system is read-only, so failures to write the bytecode of
+    templates compiled at runtime are ignored.
+    """
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as error:
+            logger.debug(f"Could not write bytecode of template '{bucket.key}': {error}")
+
+
+def init_template_bytecode_cache(app: Flask, directory: str | None = None) -> None:
+    """Load the templates of the app from a TemplateBytecodeCache.
+
+    Must be called before the Jinja environment of the app is created (i.e., before
+    any template is rendered).
+
+    Args:
+        app (Flask): Flask app.
+        directory (str | None, optional): Directory of the bytecode cache.
+            Defaults to DEFAULT_TEMPLATE_BYTECODE_CACHE_DIR.
+    """
+    app.jinja_options = {
+        **app.jinja_options,
+        "bytecode_cache": TemplateBytecodeCache(
+            directory or DEFAULT_TEMPLATE_BYTECODE_CACHE_DIR
+        ),
+    }
+
+
+def compile_templates(app: Flask | None = None) -> list[str]:
+    """Compile every template of the app into its bytecode cache.
+
+    Without an app, the templates of the web app are compiled with a bare Flask app
+    that has the same import name (hence template folder) and Jinja environment as
+    the app created by create_app, into the bytecode cache in
+    TEMPLATE_BYTECODE_CACHE_DIR. This is how templates are compiled when the image
+    is built, where the environment variables required by create_app are not set.
+
+    Returns:
+        list[str]: Names of the compiled templates.
+    """
+    if app is None:
+        app = Flask("webapp.app")
+        # Config rather than the configuration snapshot, which requires every
+        # required environment variable to be set
+        init_template_bytecode_cache(app, Config().TEMPLATE_BYTECODE_CACHE_DIR)
+    bytecode_cache = app.jinja_env.bytecode_cache
+    if not isinstance(bytecode_cache, FileSystemBytecodeCache):
+        message = "Cannot compile templates for an app without a bytecode cache"
+        raise TypeError(message)
+    os.makedirs(bytecode_cache.directory, exist_ok=True)
+    template_names = app.jinja_env.list_templates()
+    for template_name in template_names:
+        app.jinja_env.get_template(template_name)
+        logger.info(f"Compiled template '{template_name}'")
+    return template_names